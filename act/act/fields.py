@@ -0,0 +1,208 @@
+# act/act/fields.py
+import json
+
+from django.conf import settings
+from django.core.files.images import get_image_dimensions
+
+from stdimage.models import StdImageField, StdImageFieldFile
+
+from .services.image_variations import (
+    enqueue_variations, get_renditions, get_variations_spec)
+
+
+class VariationMapStdImageFieldFile(StdImageFieldFile):
+    def delete_variations(self):
+        '''
+        Extra format and density renditions are deleted along with
+        variations, both when file is deleted by field and by cleanup of
+        replaced files
+        '''
+        super(VariationMapStdImageFieldFile, self).delete_variations()
+
+        for variation in self.field.variations.values():
+            variation_name = self.get_variation_name(
+                self.name, variation['name'])
+
+            for rendition_name, _, _ in get_renditions(
+                    variation, variation_name)[1:]:
+                self.storage.delete(rendition_name)
+
+
+class VariationMapStdImageField(StdImageField):
+    '''
+    StdImageField that could keep a map of its variations (URL, width and
+    height of the original and of every variation) in a companion text
+    field named by `variations_field`, much like `width_field` and
+    `height_field` of ImageField do. Map is built once, when a new file is
+    saved, so consumers (e.g. serializers) could present variations without
+    touching storage or instantiating variation files. Companion field
+    should be declared after the image field to be saved along with it.
+
+    With `render_async` (`IMAGE_VARIATIONS_ASYNC` setting by default)
+    variations are not rendered on save, but are queued to be rendered in
+    background, see `act.services.image_variations`
+    '''
+    attr_class = VariationMapStdImageFieldFile
+
+    def __init__(self, *args, **kwargs):
+        self.variations_field = kwargs.pop('variations_field', None)
+        self.render_async = kwargs.pop(
+            'render_async',
+            getattr(settings, 'IMAGE_VARIATIONS_ASYNC', False))
+
+        if self.render_async and 'render_variations' not in kwargs:
+            kwargs['render_variations'] = self.enqueue_variations
+
+        super(VariationMapStdImageField, self).__init__(*args, **kwargs)
+
+    def enqueue_variations(self, file_name, variations, storage):
+        '''
+        `render_variations` callable, returns `False` to prevent variations
+        from being rendered synchronously
+        '''
+        if variations:
+            enqueue_variations(self, file_name)
+
+        return False
+
+    def deconstruct(self):
+        name, path, args, kwargs = super(
+            VariationMapStdImageField, self).deconstruct()
+
+        if self.variations_field:
+            kwargs['variations_field'] = self.variations_field
+
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        '''
+        File is committed (and variations are rendered, unless they are
+        queued) by parent
+        '''
+        file = getattr(model_instance, self.attname)
+        is_rendered = (
+            bool(file) and not file._committed and not self.render_async)
+
+        file = super(VariationMapStdImageField, self).pre_save(
+            model_instance, add)
+
+        if self.variations_field and file:
+            if self.get_variation_map(model_instance) is None:
+                self.update_variation_map(
+                    model_instance,
+                    spec=get_variations_spec(self) if is_rendered else None)
+
+        return file
+
+    def get_variation_names(self, file):
+        '''
+        Returns `{variation: file name}` dictionary including `original`
+        '''
+        names = {'original': file.name}
+        for key, variation in self.variations.items():
+            names[key] = self.attr_class.get_variation_name(
+                file.name, variation['name'])
+
+        return names
+
+    def describe_image(self, storage, name):
+        '''
+        Returns `{url, width, height}` dictionary or `None` for missing file
+        '''
+        if not storage.exists(name):
+            return None
+
+        with storage.open(name) as image_file:
+            width, height = get_image_dimensions(image_file)
+
+        return {'url': storage.url(name), 'width': width, 'height': height}
+
+    def build_variation_map(self, file, spec=None):
+        '''
+        Variations that are not rendered (yet) are left out of the map.
+        Rendered extra density and format renditions of a variation are
+        listed under its `renditions` key. `spec` is a digest of variation
+        params the files were rendered with, `None` if it is unknown
+        '''
+        variations = {}
+        for key, name in self.get_variation_names(file).items():
+            description = self.describe_image(file.storage, name)
+            if description is None:
+                continue
+
+            if key in self.variations:
+                renditions = []
+                for rendition_name, density, image_format in get_renditions(
+                        self.variations[key], name)[1:]:
+                    rendition = self.describe_image(
+                        file.storage, rendition_name)
+                    if rendition is None:
+                        continue
+
+                    rendition.update({
+                        'density': density,
+                        'format': image_format,
+                    })
+                    renditions.append(rendition)
+
+                if renditions:
+                    description['renditions'] = renditions
+
+            variations[key] = description
+
+        return {
+            'name': file.name,
+            'spec': spec,
+            'variations': variations,
+        }
+
+    def update_variation_map(self, model_instance, spec=None):
+        '''
+        `spec` should be passed only where variations were just rendered,
+        otherwise spec of stored map of the same file is kept
+        '''
+        file = getattr(model_instance, self.attname)
+
+        if spec is None:
+            stored_map = self.get_variation_map(model_instance)
+            spec = stored_map.get('spec') if stored_map else None
+
+        variation_map = self.build_variation_map(file, spec) if file else None
+
+        setattr(
+            model_instance, self.variations_field,
+            json.dumps(variation_map) if variation_map else '')
+
+        return variation_map
+
+    def get_variation_map(self, model_instance):
+        '''
+        Returns stored map if it describes current file, `None` otherwise.
+        Parsed map is memoized on instance until companion field changes
+        '''
+        if not self.variations_field:
+            return None
+
+        raw_map = getattr(model_instance, self.variations_field, None)
+        if not raw_map:
+            return None
+
+        memo_attname = '_%s_variation_map' % self.attname
+
+        memo = model_instance.__dict__.get(memo_attname)
+        if memo is None or memo[0] is not raw_map:
+            try:
+                memo = (raw_map, json.loads(raw_map))
+            except ValueError:
+                memo = (raw_map, None)
+
+            model_instance.__dict__[memo_attname] = memo
+
+        variation_map = memo[1]
+
+        file = getattr(model_instance, self.attname)
+        if (not variation_map or variation_map.get('name') != file.name or
+                'original' not in variation_map.get('variations', {})):
+            return None
+
+        return variation_map
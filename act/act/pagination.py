@@ -0,0 +1,124 @@
+# act/act/pagination.py
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    '''
+    Cursor pagination that seeks on every `ordering` field (e.g. on
+    `('-created_at', '-id')` composite key) instead of the first one only, so
+    that rows sharing the same ordering value never fall back to offsets.
+    Page is fetched with a single `LIMIT page_size + 1` query on an index
+    range and no `COUNT(*)` is ever run. Position is encoded within cursor as
+    `|` separated ordering values of the boundary row
+    '''
+    POSITION_SEPARATOR = '|'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+
+        if self.cursor is None:
+            self.cursor = Cursor(offset=0, reverse=False, position=None)
+
+        reverse = self.cursor.reverse
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.reverse_ordering_field(field)
+                             for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+
+        if self.cursor.position is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(queryset.model, ordering))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        has_following = len(results) > self.page_size
+        has_preceding = self.cursor.position is not None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next, self.has_previous = has_preceding, has_following
+        else:
+            self.has_next, self.has_previous = has_following, has_preceding
+
+        return self.page
+
+    @staticmethod
+    def reverse_ordering_field(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def get_position_values(self, model):
+        values = self.cursor.position.split(self.POSITION_SEPARATOR)
+
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_seek_filter(self, model, ordering):
+        '''
+        Builds lexicographic "row comes after position" condition, e.g. for
+        `('-created_at', '-id')` ordering it would be:
+        `created_at < x OR (created_at = x AND id < y)`
+        '''
+        values = self.get_position_values(model)
+
+        seek_filter = Q()
+        for index, field in enumerate(ordering):
+            field_name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+
+            condition = Q(**{
+                '%s__%s' % (field_name, lookup): values[index]})
+            for preceding_field, value in zip(ordering[:index], values):
+                condition &= Q(**{preceding_field.lstrip('-'): value})
+
+            seek_filter |= condition
+
+        return seek_filter
+
+    def get_position_from_instance(self, instance):
+        return self.POSITION_SEPARATOR.join(
+            str(getattr(instance, field.lstrip('-')))
+            for field in self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=False,
+            position=self.get_position_from_instance(self.page[-1])))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=True,
+            position=self.get_position_from_instance(self.page[0])))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
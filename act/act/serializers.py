@@ -1,12 +1,18 @@
 # act_project/act/act/serializers.py
+from collections import OrderedDict
+
+from django.db import connection
 from django.db.models.fields.files import ImageFieldFile
 
 from rest_framework import serializers
 
+from .services.image_variations import MIME_TYPES
+
 
 def set_eager_loading(get_queryset):
     '''
     Modifies returned queryset in order to fetch related records for a model
+    and to defer loading of columns that are not going to be serialized
     '''
     def decorator(self):
         queryset = get_queryset(self)
@@ -18,18 +24,126 @@ def set_eager_loading(get_queryset):
         if eager_serializer_class:
             queryset = self.get_serializer_class().set_eager_loading(queryset)
 
+        deferred_serializer_class = (
+            hasattr(self, 'get_serializer_class') and
+            hasattr(self.get_serializer_class(), 'set_deferred_loading'))
+
+        if deferred_serializer_class:
+            queryset = self.get_serializer_class().set_deferred_loading(
+                queryset, self.request)
+
         return queryset
 
     return decorator
 
 
+def get_relation_group_sql(model, relation_name):
+    '''
+    Returns `(table, group_column, joins)` describing how rows of a
+    relation are grouped by owner record: by the column of many-to-many
+    through table or by the foreign key column of related model itself
+    '''
+    qn = connection.ops.quote_name
+
+    field = model._meta.get_field(relation_name)
+    related_model = field.related_model
+    related_table = related_model._meta.db_table
+
+    if field.many_to_many:
+        through_table = field.remote_field.through._meta.db_table
+        join = '%s.%s = %s.%s' % (
+            qn(related_table), qn(related_model._meta.pk.column),
+            qn(through_table), qn(field.m2m_reverse_name()))
+
+        return through_table, field.m2m_column_name(), join
+
+    return related_table, field.field.column, None
+
+
+def annotate_relation_count(queryset, relation_name):
+    '''
+    Annotates `<relation_name>_count` with a correlated subquery, so that
+    several relations could be counted without joining them all at once
+    '''
+    qn = connection.ops.quote_name
+    model = queryset.model
+
+    table, group_column, _ = get_relation_group_sql(model, relation_name)
+
+    count_sql = 'SELECT COUNT(*) FROM %s WHERE %s.%s = %s.%s' % (
+        qn(table), qn(table), qn(group_column),
+        qn(model._meta.db_table), qn(model._meta.pk.column))
+
+    return queryset.extra(select={
+        '%s_count' % relation_name: count_sql})
+
+
+def limit_per_relation(queryset, model, relation_name, limit):
+    '''
+    Restricts queryset used to prefetch `relation_name` of `model` to the
+    first `limit` related records per owner record in terms of related
+    model's Meta `ordering`. As there are no window functions, row rank is
+    a correlated count of rows of the same group that precede it. Prefetch
+    joins many-to-many through table under its own name, so outer group
+    column is referenced by table name as well
+    '''
+    qn = connection.ops.quote_name
+
+    table, group_column, join = get_relation_group_sql(model, relation_name)
+
+    related_model = queryset.model
+    related_table = related_model._meta.db_table
+
+    preceding_conditions = []
+    for index, field in enumerate(related_model._meta.ordering):
+        column = related_model._meta.get_field(field.lstrip('-')).column
+        operator = '>' if field.startswith('-') else '<'
+
+        condition = ['ranked.%s %s %s.%s' % (
+            qn(column), operator, qn(related_table), qn(column))]
+        for preceding_field in related_model._meta.ordering[:index]:
+            preceding_column = related_model._meta.get_field(
+                preceding_field.lstrip('-')).column
+            condition.append('ranked.%s = %s.%s' % (
+                qn(preceding_column), qn(related_table),
+                qn(preceding_column)))
+
+        preceding_conditions.append('(%s)' % ' AND '.join(condition))
+
+    if join is None:
+        rank_sql = (
+            'SELECT COUNT(*) FROM {table} ranked '
+            'WHERE ranked.{column} = {table}.{column} AND ({preceding})')
+    else:
+        rank_sql = (
+            'SELECT COUNT(*) FROM {related_table} ranked '
+            'INNER JOIN {table} ranked_group '
+            'ON {join} '
+            'WHERE ranked_group.{column} = {table}.{column} '
+            'AND ({preceding})')
+        join = join.replace(qn(related_table), 'ranked').replace(
+            qn(table), 'ranked_group')
+
+    rank_sql = rank_sql.format(
+        table=qn(table),
+        related_table=qn(related_table),
+        column=qn(group_column),
+        join=join,
+        preceding=' OR '.join(preceding_conditions))
+
+    return queryset.extra(where=['(%s) < %%s' % rank_sql], params=[limit])
+
+
 class StdImageSerializer(serializers.ImageField):
     '''
     Serializer for Django Standardized Image Field package:
     https://github.com/codingjoe/django-stdimage
 
     Output representation override to include thumbnail `variations`
-    fields and present returned value as a complete dictionary
+    fields and present returned value as a complete dictionary. If image
+    field keeps a variation map (see `act.fields`), URLs are taken from
+    the map and `variations` key describes width and height of each image.
+    Images without a map are presented in the same shape
     '''
     _variation = None
 
@@ -37,6 +151,20 @@ class StdImageSerializer(serializers.ImageField):
         self._variation = kwargs.pop('variation', self._variation)
         super(StdImageSerializer, self).__init__(*args, **kwargs)
 
+    def get_variation_map(self, value):
+        get_variation_map = getattr(value.field, 'get_variation_map', None)
+        if get_variation_map is None:
+            return None
+
+        return get_variation_map(value.instance)
+
+    def build_url(self, url):
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+
+        return url
+
     def to_representation(self, value):
         '''
         Can produce single image link of one's choosing as string
@@ -46,22 +174,80 @@ class StdImageSerializer(serializers.ImageField):
         if not value:
             return None
 
-        images = {
-            key: image for key, image in value.__dict__.items()
-            if isinstance(image, ImageFieldFile)}
+        variation_map = self.get_variation_map(value)
+        if variation_map is None:
+            variation_map = self.describe_variations(value)
+
+        return self.map_to_representation(
+            variation_map, value.field.variations.keys())
+
+    @staticmethod
+    def describe_variations(value):
+        '''
+        Substitutes variation map of an image that has none (its field keeps
+        no map, or row was not saved since maps were introduced - see
+        `build_variation_maps` command), so that representation keeps the
+        same shape. URLs are taken from variation files, width and height
+        are unknown
+        '''
+        variations = {
+            'original': {'url': value.url, 'width': None, 'height': None}}
+
+        for key in value.field.variations:
+            image = getattr(value, key, None)
+            if isinstance(image, ImageFieldFile):
+                variations[key] = {
+                    'url': image.url, 'width': None, 'height': None}
+
+        return {'variations': variations}
+
+    def map_to_representation(self, variation_map, variation_names):
+        '''
+        Variations that are not rendered yet are presented with original
+        '''
+        variations = variation_map['variations']
+        original = variations['original']
 
         if self._variation:
-            try:
-                return super(StdImageSerializer, self).to_representation(
-                    images[self._variation])
-            except KeyError as e:
-                raise KeyError('No such variation in image field') from e
+            if self._variation not in variation_names:
+                raise KeyError('No such variation in image field')
 
-        representation = {
-            'original': super(
-                StdImageSerializer, self).to_representation(value), }
+            return self.build_url(
+                variations.get(self._variation, original)['url'])
 
-        for field, image in images.items():
-            representation.update({field: super().to_representation(image)})
+        representation = {}
+        details = {}
+        for key in ('original', ) + tuple(variation_names):
+            variation = variations.get(key, original)
+            url = self.build_url(variation['url'])
+
+            representation[key] = url
+            details[key] = {
+                'url': url,
+                'width': variation['width'],
+                'height': variation['height'],
+            }
+            details[key].update(self.renditions_to_representation(
+                url, variation.get('renditions', ())))
+
+        representation['variations'] = details
 
         return representation
+
+    def renditions_to_representation(self, url, renditions):
+        '''
+        Groups renditions into `srcset` of the variation format and
+        `sources` of extra formats, ready to be used within `<picture>`
+        '''
+        srcsets = OrderedDict([(None, ['%s 1x' % url])])
+        for rendition in renditions:
+            srcsets.setdefault(rendition['format'], []).append('%s %dx' % (
+                self.build_url(rendition['url']), rendition['density']))
+
+        return {
+            'srcset': ', '.join(srcsets.pop(None)),
+            'sources': [
+                {'type': MIME_TYPES.get(image_format, ''),
+                 'srcset': ', '.join(srcset)}
+                for image_format, srcset in srcsets.items()],
+        }
@@ -0,0 +1,141 @@
+# act/act/services/content_version.py
+import time
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.utils import timezone
+
+
+class ContentVersion():
+    '''
+    Per-model content version stamps kept in shared cache. Version is bumped
+    on every write to a model, so anything built on top of model data (cached
+    responses, indexes, documents) can be keyed by a set of versions and will
+    never be served stale. Initial values are time based, which guarantees
+    that an evicted stamp never goes back to a previously used number.
+
+    Time of the latest bump is stored alongside the version. Until the first
+    bump (or once evicted) it is seeded from the current time, so it never
+    goes back to a time that might have been served already
+    '''
+    KEY_FORMAT = 'content_version:{label}'
+    MODIFIED_KEY_FORMAT = 'content_modified:{label}'
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_key(self, model):
+        return self.KEY_FORMAT.format(label=model._meta.label_lower)
+
+    def get_modified_key(self, model):
+        return self.MODIFIED_KEY_FORMAT.format(
+            label=model._meta.label_lower)
+
+    @staticmethod
+    def get_initial_version():
+        return int(time.time() * 1000)
+
+    def get(self, model):
+        return self.get_many([model])[model]
+
+    def get_many(self, models):
+        '''
+        Fetches versions of all given models in a single cache round-trip
+        '''
+        keys = {self.get_key(model): model for model in models}
+        versions = self.cache.get_many(keys.keys())
+
+        result = {}
+        for key, model in keys.items():
+            if key not in versions:
+                self.cache.add(key, self.get_initial_version(), None)
+                versions[key] = self.cache.get(key)
+
+            result[model] = versions[key]
+
+        return result
+
+    def get_modified_at(self, models):
+        '''
+        Returns the latest modification time among all given models
+        '''
+        keys = {self.get_modified_key(model): model for model in models}
+        timestamps = self.cache.get_many(keys.keys())
+
+        for key, model in keys.items():
+            if key not in timestamps:
+                self.cache.add(key, timezone.now(), None)
+                timestamps[key] = self.cache.get(key)
+
+        return max(timestamps.values()) if timestamps else None
+
+    def bump_on_commit(self, model):
+        '''
+        Bumps version right away and once again after the current
+        transaction commits (immediately outside of transactions). Until
+        commit other processes read old rows, so anything they build under
+        the first bumped version would otherwise stay stale
+        '''
+        self.bump(model)
+
+        transaction.on_commit(lambda: self.bump(model))
+
+    def bump(self, model):
+        key = self.get_key(model)
+
+        self.cache.set(self.get_modified_key(model), timezone.now(), None)
+
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            version = self.get_initial_version()
+            self.cache.set(key, version, None)
+
+            return version
+
+
+content_version = ContentVersion()
+
+
+def bump_content_version(sender, **kwargs):
+    content_version.bump_on_commit(sender)
+
+
+def bump_m2m_content_version(sender, instance, action, model, **kwargs):
+    '''
+    Relation changes affect both sides of many-to-many relation
+    '''
+    if not action.startswith('post_'):
+        return
+
+    content_version.bump_on_commit(instance.__class__)
+    content_version.bump_on_commit(model)
+
+
+def track_content_versions(app_config):
+    '''
+    Connects version bumping to write signals of every application model
+    and every auto-created many-to-many through model. Should be called from
+    `AppConfig.ready()`
+    '''
+    for model in app_config.get_models():
+        dispatch_uid = 'content_version_%s' % model._meta.label_lower
+
+        post_save.connect(
+            bump_content_version, sender=model, dispatch_uid=dispatch_uid)
+        post_delete.connect(
+            bump_content_version, sender=model, dispatch_uid=dispatch_uid)
+
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+
+            m2m_changed.connect(
+                bump_m2m_content_version,
+                sender=through,
+                dispatch_uid='content_version_%s' % (
+                    through._meta.label_lower))
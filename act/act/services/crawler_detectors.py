@@ -1,4 +1,10 @@
 # act/act/services/crawler_detector.py
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+
 class CrawlerDetector:
     HTTP_USER_AGENT = 'HTTP_USER_AGENT'
 
@@ -31,3 +37,49 @@ class VkontakteCrawlerDetector(CrawlerDetector):
 
 class TwitterCrawlerDetector(CrawlerDetector):
     _user_agents = ['twitterbot']
+
+
+class CrawlerRegistry():
+    '''
+    Matches user agent against tokens of all `detectors` and of
+    `CRAWLER_USER_AGENTS` setting at once, with a single compiled regular
+    expression. Results are memoized by raw user agent string, so repeated
+    user agents cost a dictionary lookup
+    '''
+    CACHE_SIZE = 1024
+
+    def __init__(self, detectors, extra_user_agents=None):
+        self.detectors = tuple(detectors)
+
+        self.user_agents = []
+        for detector in detectors:
+            self.user_agents.extend(detector._user_agents)
+
+        if extra_user_agents is None:
+            extra_user_agents = getattr(settings, 'CRAWLER_USER_AGENTS', [])
+        self.user_agents.extend(
+            user_agent.lower() for user_agent in extra_user_agents)
+
+        ''' Longer tokens first, so the most specific one is reported '''
+        self.user_agent_re = re.compile('|'.join(
+            re.escape(user_agent)
+            for user_agent in sorted(set(self.user_agents), key=len,
+                                     reverse=True)), re.IGNORECASE)
+
+        self.match = lru_cache(maxsize=self.CACHE_SIZE)(self.match)
+
+    def match(self, user_agent):
+        '''
+        Returns matching crawler token or `None`
+        '''
+        match = self.user_agent_re.search(user_agent)
+
+        return match.group(0).lower() if match else None
+
+    def is_user_agent_matching(self, request):
+        user_agent = request.META.get(CrawlerDetector.HTTP_USER_AGENT, None)
+
+        if not user_agent:
+            return None
+
+        return self.match(user_agent)
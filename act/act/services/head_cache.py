@@ -0,0 +1,60 @@
+# act/act/services/head_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .content_version import content_version
+
+
+class HeadCache():
+    '''
+    Bounded least recently used cache of documents served to social network
+    crawlers, kept in process memory. Entries expire after `timeout` seconds
+    and every entry is tied to content versions of models its document is
+    built from, so a write to them (e.g. by scraping API) drops only the
+    entries that depend on them. Missing documents are cached as `None` the
+    same way, so crawler bursts never reach the database twice
+    '''
+    DEFAULT_SIZE = 256
+    DEFAULT_TIMEOUT = 60 * 5
+
+    def __init__(self, size=None, timeout=None):
+        self.size = size or getattr(
+            settings, 'CRAWLER_HEAD_CACHE_SIZE', self.DEFAULT_SIZE)
+        self.timeout = timeout or getattr(
+            settings, 'CRAWLER_HEAD_CACHE_TIMEOUT', self.DEFAULT_TIMEOUT)
+
+        self.entries = OrderedDict()
+
+        self.lock = threading.Lock()
+
+    def get_or_set(self, key, models, build):
+        '''
+        Returns cached document by `key`, calling `build()` on a miss or
+        once content version of any of `models` changed
+        '''
+        versions = content_version.get_many(models)
+        version = tuple(versions[model] for model in models)
+        now = time.monotonic()
+
+        with self.lock:
+            if key in self.entries:
+                expires_at, entry_version, document = self.entries[key]
+
+                if expires_at > now and entry_version == version:
+                    self.entries.move_to_end(key)
+                    return document
+
+                del self.entries[key]
+
+        document = build()
+
+        with self.lock:
+            self.entries[key] = (now + self.timeout, version, document)
+
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+        return document
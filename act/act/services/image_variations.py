@@ -0,0 +1,530 @@
+# act/act/services/image_variations.py
+import os
+import json
+import time
+import hashlib
+from io import BytesIO
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+from stdimage.models import StdImageField
+
+
+def get_job_model():
+    return apps.get_model(settings.IMAGE_VARIATION_JOB_MODEL)
+
+
+def get_image_field(label, field_name):
+    return apps.get_model(label)._meta.get_field(field_name)
+
+
+def get_image_fields(app_labels=None):
+    '''
+    Returns concrete StdImage fields of models of given (or all)
+    applications
+    '''
+    if app_labels:
+        models = [
+            model for app_label in app_labels
+            for model in apps.get_app_config(app_label).get_models()]
+    else:
+        models = apps.get_models()
+
+    return [
+        field for model in models
+        for field in model._meta.local_concrete_fields
+        if isinstance(field, StdImageField)]
+
+
+SAVE_OPTIONS = {
+    'JPEG': {'optimize': True},
+    'WEBP': {'quality': 80},
+}
+
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+
+def get_variations_spec(field):
+    '''
+    Digest of variation params of a field, stored within variation maps
+    to tell whether files were rendered with current params
+    '''
+    params = {
+        key: {
+            param: value for param, value in variation.items()
+            if param != 'resample'}
+        for key, variation in field.variations.items()}
+
+    return hashlib.md5(json.dumps(
+        params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def is_format_supported(image_format):
+    Image.init()
+    return image_format.upper() in Image.SAVE
+
+
+def get_rendition_name(variation_name, density=1, image_format=None):
+    '''
+    E.g. `name.square.jpg` would have `name.square@2x.jpg` rendition for
+    double density, and `name.square@2x.webp` for double density WebP
+    '''
+    name, extension = os.path.splitext(variation_name)
+
+    if density != 1:
+        name = '%s@%dx' % (name, density)
+    if image_format:
+        extension = '.%s' % image_format.lower()
+
+    return name + extension
+
+
+def get_renditions(variation, variation_name):
+    '''
+    Returns `(name, density, format)` tuples for every file variation is
+    rendered into. Apart from the variation itself (original format,
+    density 1) variation params could opt in for extra `densities` (e.g.
+    `(2, )`) and extra `formats` (e.g. `('WEBP', )`). Formats unsupported by
+    installed Pillow are skipped
+    '''
+    densities = (1, ) + tuple(variation.get('densities', ()))
+    formats = (None, ) + tuple(
+        image_format.upper() for image_format in variation.get('formats', ())
+        if is_format_supported(image_format))
+
+    return [
+        (get_rendition_name(variation_name, density, image_format),
+         density, image_format)
+        for density in densities
+        for image_format in formats]
+
+
+def render_variation(file_name, variation, storage, variation_name):
+    '''
+    Renders every rendition of a variation the same way
+    `StdImageFieldFile` does, decoding the original only once. JPEG decoder
+    is let to downscale while decoding with `draft()`: it picks the largest
+    power of two reduction that still keeps image at least as big as the
+    largest rendition. Density renditions are never upscaled
+    '''
+    width, height = variation['width'], variation['height']
+    resample = variation['resample']
+
+    renditions = get_renditions(variation, variation_name)
+    rendered = []
+
+    with storage.open(file_name) as original:
+        image = Image.open(original)
+        original_format = image.format
+
+        sizes = {
+            density: (width * density, height * density)
+            for _, density, _ in renditions} if width and height else {}
+
+        if original_format == 'JPEG' and sizes:
+            image.draft(image.mode, max(sizes.values()))
+
+        image.load()
+
+        for name, density, image_format in renditions:
+            size = sizes.get(density)
+
+            if density != 1 and (
+                    size is None or
+                    image.size[0] < size[0] or image.size[1] < size[1]):
+                continue
+
+            resized = image
+            if size and (image.size[0] > size[0] or image.size[1] > size[1]):
+                if variation['crop']:
+                    resized = ImageOps.fit(image, size, method=resample)
+                else:
+                    resized = image.copy()
+                    resized.thumbnail(size, resample=resample)
+
+            image_format = image_format or original_format
+            if image_format == 'WEBP' and resized.mode not in ('RGB', 'RGBA'):
+                has_alpha = (
+                    'A' in resized.mode or 'transparency' in resized.info)
+                resized = resized.convert('RGBA' if has_alpha else 'RGB')
+
+            with BytesIO() as buffer:
+                resized.save(
+                    buffer, image_format, **SAVE_OPTIONS.get(image_format, {}))
+
+                if storage.exists(name):
+                    storage.delete(name)
+                storage.save(name, ContentFile(buffer.getvalue()))
+
+            rendered.append(name)
+
+    return rendered
+
+
+def render_variations(label, field_name, file_name):
+    '''
+    Process pool entry point: renders every variation of a file. Returns
+    `None` on success or error description
+    '''
+    field = get_image_field(label, field_name)
+
+    try:
+        for variation in field.variations.values():
+            variation_name = field.attr_class.get_variation_name(
+                file_name, variation['name'])
+
+            render_variation(
+                file_name, variation, field.storage, variation_name)
+    except Exception as e:
+        return '%s: %s' % (e.__class__.__name__, e)
+
+    return None
+
+
+def get_expected_renditions(variation, variation_name, original_size):
+    '''
+    Returns names of renditions `render_variation()` produces for original
+    of given size, density renditions larger than original are not
+    '''
+    width, height = variation['width'], variation['height']
+
+    return [
+        name
+        for name, density, _ in get_renditions(variation, variation_name)
+        if density == 1 or (
+            width and height and
+            original_size[0] >= width * density and
+            original_size[1] >= height * density)]
+
+
+def rebuild_variations(label, field_name, file_name, map_spec, force):
+    '''
+    Process pool entry point: renders variations of a file if they are
+    stale - rendered with different or unknown params (according to
+    `map_spec` stored within variation map) or missing, including format
+    and density renditions. Returns `(status, error)` pair
+    '''
+    field = get_image_field(label, field_name)
+    storage = field.storage
+
+    try:
+        if not storage.exists(file_name):
+            return ImageVariationRebuilder.STATUS_FAILED, 'No original file'
+
+        variation_names = [
+            field.attr_class.get_variation_name(file_name, variation['name'])
+            for variation in field.variations.values()]
+
+        ''' Only header of the original is read '''
+        with storage.open(file_name) as original:
+            original_size = Image.open(original).size
+
+        rendition_names = [
+            name
+            for variation, variation_name in zip(
+                field.variations.values(), variation_names)
+            for name in get_expected_renditions(
+                variation, variation_name, original_size)]
+
+        is_stale = (
+            force or
+            (getattr(field, 'variations_field', None) and
+                map_spec != get_variations_spec(field)) or
+            not all(storage.exists(name) for name in rendition_names))
+
+        if not is_stale:
+            return ImageVariationRebuilder.STATUS_SKIPPED, None
+
+        for variation, variation_name in zip(
+                field.variations.values(), variation_names):
+            render_variation(file_name, variation, storage, variation_name)
+    except Exception as e:
+        return (
+            ImageVariationRebuilder.STATUS_FAILED,
+            '%s: %s' % (e.__class__.__name__, e))
+
+    return ImageVariationRebuilder.STATUS_RENDERED, None
+
+
+class ImageVariationRebuilder():
+    '''
+    Regenerates missing or stale variations of every stored image of given
+    fields with a local process pool. Every processed image is appended to
+    checkpoint file, so an interrupted rebuild resumes where it stopped.
+    Checkpoint is removed once rebuild is complete
+    '''
+    STATUS_RENDERED = 'rendered'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_FAILED = 'failed'
+
+    PROGRESS_INTERVAL = 100
+
+    def __init__(self, checkpoint_path, workers=None, force=False,
+                 report=None):
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers or getattr(
+            settings, 'IMAGE_VARIATION_WORKERS', None)
+        self.force = force
+        self.report = report
+
+    @staticmethod
+    def get_task_key(label, field_name, file_name):
+        return '%s:%s:%s' % (label, field_name, file_name)
+
+    def read_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+
+        with open(self.checkpoint_path) as checkpoint:
+            return set(line.rstrip('\n') for line in checkpoint)
+
+    def clear_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+    def get_tasks(self, fields):
+        '''
+        Returns `(label, field name, file name, map spec)` tuples of images
+        that are not in checkpoint yet
+        '''
+        processed = self.read_checkpoint()
+
+        tasks = OrderedDict()
+        for field in fields:
+            label = field.model._meta.label
+            variations_field = getattr(field, 'variations_field', None)
+
+            rows = (
+                field.model._default_manager
+                .exclude(**{field.name: ''})
+                .order_by('pk')
+                .values_list(field.name, variations_field or field.name))
+
+            for file_name, raw_map in rows:
+                key = self.get_task_key(label, field.name, file_name)
+                if key in processed or key in tasks:
+                    continue
+
+                map_spec = None
+                if variations_field and raw_map:
+                    try:
+                        map_spec = json.loads(raw_map).get('spec')
+                    except ValueError:
+                        pass
+
+                tasks[key] = (label, field.name, file_name, map_spec)
+
+        return list(tasks.values())
+
+    def rebuild(self, fields):
+        '''
+        Returns `(stats, errors)` pair, where errors are `(file name,
+        error)` pairs of images that failed
+        '''
+        tasks = self.get_tasks(fields)
+
+        stats = OrderedDict([
+            ('total', len(tasks)),
+            (self.STATUS_RENDERED, 0),
+            (self.STATUS_SKIPPED, 0),
+            (self.STATUS_FAILED, 0),
+            ('images_per_second', 0),
+        ])
+        errors = []
+
+        # Forked workers should not share parent database connections
+        connections.close_all()
+
+        started_at = time.time()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor, \
+                open(self.checkpoint_path, 'a') as checkpoint:
+            results = executor.map(
+                rebuild_variations,
+                [task[0] for task in tasks],
+                [task[1] for task in tasks],
+                [task[2] for task in tasks],
+                [task[3] for task in tasks],
+                [self.force] * len(tasks),
+                chunksize=10)
+
+            for index, (task, (status, error)) in enumerate(
+                    zip(tasks, results), 1):
+                label, field_name, file_name, _ = task
+
+                if status == self.STATUS_RENDERED:
+                    ImageVariationQueue.update_variation_maps(
+                        label, field_name, file_name)
+                elif status == self.STATUS_FAILED:
+                    errors.append((file_name, error))
+
+                stats[status] += 1
+
+                checkpoint.write(
+                    self.get_task_key(label, field_name, file_name) + '\n')
+                checkpoint.flush()
+
+                stats['images_per_second'] = index / max(
+                    time.time() - started_at, 0.001)
+
+                if self.report and index % self.PROGRESS_INTERVAL == 0:
+                    self.report(stats)
+
+        self.clear_checkpoint()
+
+        return stats, errors
+
+
+class ImageVariationQueue():
+    '''
+    Renders variations of uploaded images in background. Image field
+    enqueues a job instead of rendering variations within request, and
+    the original image is served until the job is done. Jobs are claimed in
+    batches and rendered in parallel by a local process pool, after that
+    variation maps of the rows referencing rendered file are updated.
+    Failed jobs are retried with exponential backoff
+    '''
+    BATCH_SIZE = 50
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = 60
+
+    def __init__(self, workers=None, batch_size=None):
+        self.workers = workers or getattr(
+            settings, 'IMAGE_VARIATION_WORKERS', None)
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.retry_delay = getattr(
+            settings, 'IMAGE_VARIATION_RETRY_DELAY', self.RETRY_DELAY)
+
+        self.job_model = get_job_model()
+
+    def enqueue(self, field, file_name):
+        return self.job_model.objects.create(
+            label=field.model._meta.label,
+            field_name=field.name,
+            file_name=file_name)
+
+    def enqueue_existing(self, fields):
+        '''
+        Enqueues every stored file of given fields, except files that are
+        already queued. Returns number of enqueued jobs
+        '''
+        job_model = self.job_model
+
+        jobs = []
+        for field in fields:
+            label = field.model._meta.label
+
+            queued = set(
+                job_model.objects.filter_queued()
+                .filter(label=label, field_name=field.name)
+                .values_list('file_name', flat=True))
+
+            file_names = (
+                field.model._default_manager
+                .exclude(**{field.name: ''})
+                .order_by()
+                .values_list(field.name, flat=True)
+                .distinct())
+
+            jobs.extend(
+                job_model(
+                    label=label, field_name=field.name, file_name=file_name)
+                for file_name in file_names if file_name not in queued)
+
+        job_model.objects.bulk_create(jobs, batch_size=self.BATCH_SIZE)
+
+        return len(jobs)
+
+    def claim_batch(self):
+        '''
+        Jobs are claimed one by one with conditional update, so concurrent
+        workers never render the same job
+        '''
+        job_model = self.job_model
+
+        candidates = list(
+            job_model.objects.filter_claimable()
+            .values_list('id', flat=True)[:self.batch_size])
+
+        claimed = [
+            job_id for job_id in candidates
+            if job_model.objects.filter_claimable().filter(id=job_id)
+            .update(status=job_model.STATUS_PROCESSING,
+                    started_at=timezone.now())]
+
+        return list(job_model.objects.filter(id__in=claimed))
+
+    def process_batch(self):
+        jobs = self.claim_batch()
+        if not jobs:
+            return 0
+
+        ''' Forked workers should not share parent database connections '''
+        connections.close_all()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            errors = list(executor.map(
+                render_variations,
+                [job.label for job in jobs],
+                [job.field_name for job in jobs],
+                [job.file_name for job in jobs]))
+
+        for job, error in zip(jobs, errors):
+            if error is None:
+                self.update_variation_maps(
+                    job.label, job.field_name, job.file_name)
+                job.mark_done()
+            else:
+                job.mark_failed(error, self.MAX_ATTEMPTS, self.retry_delay)
+
+        return len(jobs)
+
+    def process(self):
+        '''
+        Processes claimable jobs until none is left, jobs deferred after a
+        failure are left for later runs
+        '''
+        processed = 0
+
+        while True:
+            batch_processed = self.process_batch()
+            if not batch_processed:
+                return processed
+
+            processed += batch_processed
+
+    @staticmethod
+    def update_variation_maps(label, field_name, file_name):
+        '''
+        Called once variations of a file are rendered, so maps are marked
+        with spec of current params. Rows are saved one by one to notify
+        content version tracking
+        '''
+        field = get_image_field(label, field_name)
+        if not getattr(field, 'variations_field', None):
+            return
+
+        instances = field.model._default_manager.filter(
+            **{field.name: file_name})
+
+        spec = get_variations_spec(field)
+
+        for instance in instances:
+            field.update_variation_map(instance, spec=spec)
+            instance.save(update_fields=[field.variations_field])
+
+
+def enqueue_variations(field, file_name):
+    ImageVariationQueue().enqueue(field, file_name)
@@ -0,0 +1,123 @@
+# act/act/services/mail_outbox.py
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.mail import get_connection, EmailMessage
+from django.utils import timezone
+
+from .mailer import get_outbox_model
+
+
+class MailOutbox():
+    '''
+    Delivers e-mails queued by `MailerMixin.queue_email()`. Due e-mails are
+    claimed in batches, rendered and sent through a single connection per
+    batch. Failed deliveries are retried with exponential backoff.
+    `MAIL_OUTBOX_EMAIL_BACKEND` setting overrides `EMAIL_BACKEND`, e.g. with
+    `django.core.mail.backends.locmem.EmailBackend` as SMTP stand-in
+    '''
+    BATCH_SIZE = 50
+
+    def __init__(self, batch_size=None):
+        self.batch_size = batch_size or self.BATCH_SIZE
+
+        self.backend = getattr(settings, 'MAIL_OUTBOX_EMAIL_BACKEND', None)
+        self.max_attempts = settings.MAIL_OUTBOX_MAX_ATTEMPTS
+        self.retry_delay = settings.MAIL_OUTBOX_RETRY_DELAY
+
+        self.outbox_model = get_outbox_model()
+        self.logger = logging.getLogger('commands')
+
+    def claim_batch(self):
+        '''
+        E-mails are claimed one by one with conditional update, so
+        concurrent workers never send the same e-mail twice
+        '''
+        outbox_model = self.outbox_model
+
+        candidates = list(
+            outbox_model.objects.filter_due()
+            .values_list('id', flat=True)[:self.batch_size])
+
+        claimed = [
+            email_id for email_id in candidates
+            if outbox_model.objects.filter_due().filter(id=email_id)
+            .update(status=outbox_model.STATUS_SENDING,
+                    started_at=timezone.now())]
+
+        return list(
+            outbox_model.objects.filter(id__in=claimed)
+            .order_by('next_attempt_at', 'id'))
+
+    @staticmethod
+    def build_message(email):
+        message = EmailMessage(
+            email.subject, email.render_body(),
+            email.email_from, [email.email_to])
+        message.content_subtype = 'html'
+
+        return message
+
+    def deliver(self, email, connection):
+        try:
+            message = self.build_message(email)
+        except ObjectDoesNotExist as e:
+            ''' Object is gone, there is nothing to retry '''
+            email.mark_failed(repr(e), 0, self.retry_delay)
+            return False
+        except Exception as e:
+            ''' Rendering failed, e-mail is retried until out of attempts '''
+            self.logger.exception('E-mail %d could not be built', email.id)
+            email.mark_failed(repr(e), self.max_attempts, self.retry_delay)
+            return False
+
+        try:
+            connection.send_messages([message])
+        except Exception as e:
+            self.logger.error(repr(e))
+            email.mark_failed(repr(e), self.max_attempts, self.retry_delay)
+            return False
+
+        email.mark_sent()
+
+        return True
+
+    def process_batch(self):
+        '''
+        Returns `(claimed, sent)` pair
+        '''
+        emails = self.claim_batch()
+        if not emails:
+            return 0, 0
+
+        connection = get_connection(self.backend)
+
+        try:
+            connection.open()
+        except Exception as e:
+            self.logger.error(repr(e))
+
+            for email in emails:
+                email.mark_failed(repr(e), self.max_attempts, self.retry_delay)
+
+            return len(emails), 0
+
+        sent = 0
+        try:
+            for email in emails:
+                sent += self.deliver(email, connection)
+        finally:
+            connection.close()
+
+        return len(emails), sent
+
+    def process(self):
+        sent = 0
+
+        while True:
+            batch_claimed, batch_sent = self.process_batch()
+            if not batch_claimed:
+                return sent
+
+            sent += batch_sent
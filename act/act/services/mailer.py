@@ -1,9 +1,226 @@
 # act_project/act/act/services/mailer.py
+import time
+import queue
+import smtplib
+import logging
+import threading
+
+from django.apps import apps
 from django.core.exceptions import ImproperlyConfigured
 from django.core.mail import get_connection, EmailMessage
 
 from django.conf import settings
 
+from act.utils import chunked
+
+
+''' Errors that concern a single recipient, not the connection '''
+RECIPIENT_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)
+
+logger = logging.getLogger('commands')
+
+
+class RecipientsDeferred(Exception):
+    '''
+    Raised once mailing is sent, if some recipients were refused
+    temporarily, so that they are retried when mailing is resumed
+    '''
+    def __init__(self, count):
+        super(RecipientsDeferred, self).__init__(
+            '%d recipient(s) were refused temporarily' % count)
+        self.count = count
+
+
+def is_permanent_refusal(error):
+    '''
+    Only `5xx` replies are permanent, `4xx` ones (e.g. greylisting or rate
+    limiting) ask to try again later
+    '''
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+    else:
+        codes = [error.smtp_code]
+
+    return bool(codes) and all(code >= 500 for code in codes)
+
+
+def get_outbox_model():
+    return apps.get_model(settings.MAIL_OUTBOX_MODEL)
+
+
+def send_batch(connection, batch, throttle, processed):
+    '''
+    Sends `(recipient, message)` pairs over open connection, appending
+    recipients that are done with to `processed`: the ones message was
+    delivered to and the ones refused permanently (e.g. unknown mailbox),
+    as sending to them again would fail the same way. Recipients refused
+    temporarily are left out to be retried. Returns `(refused, deferred)`
+    numbers of recipients. Connection level errors are raised
+    '''
+    refused = deferred = 0
+
+    for recipient, message in batch:
+        throttle.wait()
+
+        try:
+            connection.send_messages([message])
+        except RECIPIENT_ERRORS as e:
+            if not is_permanent_refusal(e):
+                logger.warning('E-mail to %s was deferred: %r', message.to, e)
+                deferred += 1
+                continue
+
+            logger.warning('E-mail to %s was refused: %r', message.to, e)
+            refused += 1
+
+        processed.append(recipient)
+
+    return refused, deferred
+
+
+class Throttle():
+    '''
+    Keeps pace of `rate` events per second, `None` means no limit. Could be
+    shared between threads: each call reserves its own time slot
+    '''
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.started_at = None
+        self.count = 0
+
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.rate:
+            return
+
+        with self.lock:
+            if self.started_at is None:
+                self.started_at = time.monotonic()
+
+            slot = self.started_at + self.count / self.rate
+            self.count += 1
+
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class PooledSender():
+    '''
+    Sends batches of `(recipient, message)` pairs over `size` connections,
+    each one owned by its own worker thread and reused between batches.
+    Producer is blocked while `size * 2` batches are waiting to be sent, so
+    messages are never built far ahead of delivery. Rate limit is shared
+    by all connections. Per connection metrics are kept in `metrics`
+    '''
+    def __init__(self, size, rate_limit=None, backend=None,
+                 connection_kwargs=None):
+        self.size = size
+        self.throttle = Throttle(rate_limit)
+        self.backend = backend
+        self.connection_kwargs = connection_kwargs or {}
+
+        self.metrics = [
+            {'messages': 0, 'refused': 0, 'deferred': 0, 'errors': 0,
+             'seconds': 0.0}
+            for _ in range(size)]
+
+    def work(self, index, batches, results):
+        connection = get_connection(self.backend, **self.connection_kwargs)
+        metrics = self.metrics[index]
+
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+
+            started_at = time.monotonic()
+            delivered, error = [], None
+
+            try:
+                connection.open()
+
+                refused, deferred = send_batch(
+                    connection, batch, self.throttle, delivered)
+
+                metrics['refused'] += refused
+                metrics['deferred'] += deferred
+            except Exception as e:
+                error = e
+                metrics['errors'] += 1
+
+                # Connection is reopened for the next batch
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+            metrics['messages'] += len(delivered)
+            metrics['seconds'] += time.monotonic() - started_at
+
+            results.put((delivered, error))
+
+        connection.close()
+
+    def send(self, batches):
+        '''
+        Generator yielding lists of processed (delivered or refused)
+        recipients as batches are sent. The first connection error is
+        raised once all the other batches were sent
+        '''
+        pending = queue.Queue(maxsize=self.size * 2)
+        results = queue.Queue()
+
+        workers = [
+            threading.Thread(
+                target=self.work, args=(index, pending, results), daemon=True)
+            for index in range(self.size)]
+        for worker in workers:
+            worker.start()
+
+        errors = []
+        in_flight = 0
+
+        try:
+            for batch in batches:
+                pending.put(batch)
+                in_flight += 1
+
+                while not results.empty():
+                    delivered, error = results.get()
+                    in_flight -= 1
+
+                    if error is not None:
+                        errors.append(error)
+                    yield delivered
+        finally:
+            for _ in workers:
+                pending.put(None)
+
+        while in_flight:
+            delivered, error = results.get()
+            in_flight -= 1
+
+            if error is not None:
+                errors.append(error)
+            yield delivered
+
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            raise errors[0]
+
+    def get_throughput(self):
+        '''
+        Returns messages per second of every connection
+        '''
+        return [
+            metrics['messages'] / metrics['seconds']
+            if metrics['seconds'] else 0.0
+            for metrics in self.metrics]
+
 
 class MailerMixin():
     def __init__(self, *args, **kwargs):
@@ -44,6 +261,27 @@ class MailerMixin():
         message.content_subtype = 'html'
         message.send()
 
+    def queue_email(
+            self, subject, instance, body_method, email_from=None,
+            email_to=None):
+        '''
+        Puts e-mail to outbox instead of sending it, so caller is never
+        blocked by SMTP. Body is rendered on delivery by calling
+        `body_method` of `instance`
+        '''
+        email_from = self.get_email_from(email_from)
+
+        if email_to is None:
+            email_to = self.email_to
+
+        return get_outbox_model().objects.create(
+            subject=subject,
+            email_from=email_from,
+            email_to=email_to,
+            label=instance._meta.label,
+            object_id=instance.pk,
+            body_method=body_method)
+
     def send_mass_email(
             self, recipients, subject_lambda, body_lambda, email_to_lambda,
             email_from=None):
@@ -56,24 +294,76 @@ class MailerMixin():
         recipient's email_to, subject and body without tight coupling to
         recipient object instance itself.
         '''
+        for _ in self.iter_send_mass_email(
+                recipients, subject_lambda, body_lambda, email_to_lambda,
+                email_from):
+            pass
+
+    def iter_send_mass_email(
+            self, recipients, subject_lambda, body_lambda, email_to_lambda,
+            email_from=None, batch_size=None, rate_limit=None,
+            pool_size=1):
+        '''
+        Generator counterpart of `send_mass_email()`: recipients are consumed
+        lazily in batches of `batch_size`, each batch is sent over its own
+        connection at a pace of `rate_limit` messages per second, and list
+        of recipients the batch was processed for (see `send_batch()`) is
+        yielded. Refused recipients do not stop delivery, if connection
+        fails, recipients processed so far are yielded before the error is
+        raised, so caller could record them. If some recipients were refused
+        temporarily, `RecipientsDeferred` is raised once all batches are
+        sent, so caller does not consider them done. With `pool_size`
+        greater than one batches are sent in parallel by `PooledSender`
+        (kept as `sender` for its metrics), messages are still built within
+        calling thread
+        '''
         email_from = self.get_email_from(email_from)
 
         if recipients is None:
             return
 
-        messages = []
-        for recipient in recipients:
-            subject = subject_lambda(recipient)
-            body = body_lambda(recipient)
-            email_to = email_to_lambda(recipient)
+        def build_messages():
+            for recipient in recipients:
+                message = EmailMessage(
+                    subject_lambda(recipient),
+                    body_lambda(recipient),
+                    email_from,
+                    [email_to_lambda(recipient)])
+                message.content_subtype = 'html'
 
-            message = EmailMessage(
-                subject, body, email_from, [email_to])
-            message.content_subtype = 'html'
+                yield recipient, message
 
-            messages.append(message)
+        batches = chunked(build_messages(), batch_size or 100)
+
+        if pool_size > 1:
+            self.sender = PooledSender(pool_size, rate_limit)
+            yield from self.sender.send(batches)
+
+            deferred = sum(
+                metrics['deferred'] for metrics in self.sender.metrics)
+            if deferred:
+                raise RecipientsDeferred(deferred)
+            return
+
+        throttle = Throttle(rate_limit)
+        deferred = 0
+
+        for batch in batches:
+            delivered = []
 
-        if messages:
             self.connection.open()
-            self.connection.send_messages(messages)
+            try:
+                deferred += send_batch(
+                    self.connection, batch, throttle, delivered)[1]
+            except Exception:
+                self.connection.close()
+
+                yield delivered
+                raise
+
             self.connection.close()
+
+            yield delivered
+
+        if deferred:
+            raise RecipientsDeferred(deferred)
@@ -0,0 +1,112 @@
+# act/act/services/neighbour_index.py
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import caches
+
+from .content_version import content_version
+
+
+class NeighbourIndex():
+    '''
+    Ordered index of `(ordering values..., id, slug)` tuples for model rows
+    matching `filter_kwargs`, sorted ascending by model's Meta `ordering`
+    fields. Previous and next rows of any instance are found with a binary
+    search, without any database queries.
+
+    Index is built with a single query and is tied to model's content
+    version: it is kept in process memory and in shared cache, and gets
+    rebuilt once after any write to the model
+    '''
+    KEY_FORMAT = 'neighbour_index:{label}:{version}:{filters}'
+
+    _indexes = {}
+
+    def __init__(self, model, filter_kwargs=None, cache_alias='default'):
+        self.model = model
+        self.filter_kwargs = filter_kwargs or {}
+        self.cache_alias = cache_alias
+
+        self.ordering_fields = tuple(
+            field.lstrip('-') for field in model._meta.ordering)
+        self.fields = self.ordering_fields + tuple(
+            field for field in ('id', 'slug', )
+            if field not in self.ordering_fields)
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_key(self, version):
+        filters = ','.join(
+            '%s=%s' % (key, value)
+            for key, value in sorted(self.filter_kwargs.items()))
+
+        return self.KEY_FORMAT.format(
+            label=self.model._meta.label_lower,
+            version=version,
+            filters=filters)
+
+    def build(self):
+        return list(
+            self.model._default_manager
+            .filter(**self.filter_kwargs)
+            .order_by(*self.ordering_fields)
+            .values_list(*self.fields))
+
+    def get_entries(self):
+        '''
+        Returns `(keys, entries)` pair, where keys are ordering values of
+        entries, prepared for binary search
+        '''
+        key = self.get_key(content_version.get(self.model))
+
+        ''' Only the latest index is kept in memory for a given model '''
+        memory_key = (self.model, tuple(sorted(self.filter_kwargs.items())))
+
+        indexed_key, index = self._indexes.get(memory_key, (None, None))
+        if indexed_key == key:
+            return index
+
+        entries = self.cache.get(key)
+        if entries is None:
+            entries = self.build()
+            self.cache.set(key, entries, None)
+
+        keys = [entry[:len(self.ordering_fields)] for entry in entries]
+        index = (keys, entries)
+
+        self._indexes[memory_key] = (key, index)
+
+        return index
+
+    def get_instance_key(self, instance):
+        return tuple(
+            getattr(instance, field) for field in self.ordering_fields)
+
+    def get_adjacent(self, instance):
+        '''
+        Returns `(previous, next)` pair of `{'id': ..., 'slug': ...}`
+        dictionaries (or `None`) in terms of ascending ordering, the same
+        as `get_previous_by_*()` / `get_next_by_*()` model methods do
+        '''
+        keys, entries = self.get_entries()
+
+        instance_key = self.get_instance_key(instance)
+
+        prev_position = bisect_left(keys, instance_key) - 1
+        next_position = bisect_right(keys, instance_key)
+
+        prev_entry = entries[prev_position] if prev_position >= 0 else None
+        next_entry = (
+            entries[next_position] if next_position < len(entries) else None)
+
+        return self.serialize(prev_entry), self.serialize(next_entry)
+
+    def serialize(self, entry):
+        if entry is None:
+            return None
+
+        return {
+            'id': entry[self.fields.index('id')],
+            'slug': entry[self.fields.index('slug')],
+        }
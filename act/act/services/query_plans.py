@@ -0,0 +1,70 @@
+# act_project/act/act/services/query_plans.py
+from django.apps import apps
+from django.db import connection
+from django.utils import timezone
+
+SUPPORTED_VENDORS = ('mysql', 'sqlite')
+
+
+def get_hot_queries():
+    '''
+    Returns `(name, queryset)` tuples of queries served on every request
+    '''
+    Event = apps.get_model('website', 'Event')
+    Project = apps.get_model('website', 'Project')
+    Scraping = apps.get_model('website', 'Scraping')
+    Subscriber = apps.get_model('subscription', 'Subscriber')
+    Metadata = apps.get_model('metadata', 'Metadata')
+
+    return [
+        ('Event active', Event.objects.filter_active_limit()),
+        ('Event active since', Event.objects.filter_active_created_at_gt(
+            timezone.now())),
+        ('Event ordering',
+            Event.objects.all()[:Event.PAGE_SIZE['default']]),
+        ('Project ordering',
+            Project.objects.all()[:Project.PAGE_SIZE['default']]),
+        ('Subscriber active', Subscriber.objects.filter_active()),
+        ('Scraping path', Scraping.objects.filter(
+            path_hash=Scraping.get_path_hash('/'))),
+        ('Metadata url_name', Metadata.objects.filter(url_name='index')),
+    ]
+
+
+def explain(queryset):
+    '''
+    Returns list of `(table, access, is_full_scan)` tuples of query plan
+    '''
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [
+                (None, row[-1], (
+                    row[-1].startswith('SCAN') and 'INDEX' not in row[-1]))
+                for row in cursor.fetchall()]
+
+        cursor.execute('EXPLAIN ' + sql, params)
+        columns = [column[0] for column in cursor.description]
+
+        plan = []
+        for row in cursor.fetchall():
+            row = dict(zip(columns, row))
+            plan.append((
+                row['table'],
+                '%s (key: %s)' % (row['type'], row['key']),
+                row['type'] == 'ALL'))
+
+        return plan
+
+
+def explain_hot_queries():
+    '''
+    Returns list of `(name, table, access, is_full_scan)` tuples of query
+    plans of hot queries
+    '''
+    return [
+        (name, table, access, is_full_scan)
+        for name, queryset in get_hot_queries()
+        for table, access, is_full_scan in explain(queryset)]
@@ -0,0 +1,130 @@
+# act/act/services/response_cache.py
+import time
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.translation import get_language
+
+
+class ResponseCache():
+    '''
+    Stores rendered API responses keyed by view, query parameters, format,
+    language and content versions of the models response is built from.
+    Content versions are bumped on write, so entries are never invalidated
+    explicitly - they just stop being addressed. Hits and misses are counted
+    in process memory and added to shared counters in the same cache backend
+    at most once per `RESPONSE_CACHE_STATS_INTERVAL` seconds, so requests do
+    not write to the cache just to be counted
+    '''
+    KEY_FORMAT = 'response:{view}:{digest}'
+    STATS_KEY_FORMAT = 'response_stats:{counter}'
+
+    DEFAULT_TIMEOUT = 60 * 60 * 24
+    DEFAULT_STATS_INTERVAL = 60
+
+    def __init__(self):
+        self.cache_alias = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+        self.timeout = getattr(
+            settings, 'RESPONSE_CACHE_TIMEOUT', self.DEFAULT_TIMEOUT)
+        self.stats_interval = getattr(
+            settings, 'RESPONSE_CACHE_STATS_INTERVAL',
+            self.DEFAULT_STATS_INTERVAL)
+
+        self.counters = Counter()
+        self.counted_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def get_digest(request, view_kwargs, versions):
+        '''
+        Digest identifies response content. It also serves as an entity tag
+        for conditional requests
+        '''
+        digest_parts = [
+            request.path,
+            '&'.join(sorted(
+                '%s=%s' % (key, value)
+                for key in request.GET
+                for value in request.GET.getlist(key))),
+            str(view_kwargs.get('format')),
+            request.META.get('HTTP_ACCEPT', ''),
+            str(get_language()),
+        ] + sorted(
+            '%s=%s' % (model._meta.label_lower, version)
+            for model, version in versions.items())
+
+        return hashlib.md5('|'.join(digest_parts).encode()).hexdigest()
+
+    def get_key(self, view_name, digest):
+        return self.KEY_FORMAT.format(view=view_name, digest=digest)
+
+    def get(self, key):
+        cached = self.cache.get(key)
+
+        if cached is None:
+            self.increment('misses')
+            return None
+
+        self.increment('hits')
+
+        response = HttpResponse(cached['content'], status=cached['status'])
+        for header, value in cached['headers']:
+            response[header] = value
+
+        return response
+
+    def set(self, key, response):
+        '''
+        Response should be rendered before it gets cached
+        '''
+        self.cache.set(key, {
+            'content': response.content,
+            'status': response.status_code,
+            'headers': list(response.items()),
+        }, self.timeout)
+
+    def increment(self, counter):
+        now = time.monotonic()
+
+        with self.lock:
+            self.counters[counter] += 1
+
+            if now - self.counted_at < self.stats_interval:
+                return
+
+            counters, self.counters = self.counters, Counter()
+            self.counted_at = now
+
+        self.flush_counters(counters)
+
+    def flush_counters(self, counters):
+        for counter, delta in counters.items():
+            key = self.STATS_KEY_FORMAT.format(counter=counter)
+
+            self.cache.add(key, 0, None)
+            try:
+                self.cache.incr(key, delta)
+            except ValueError:
+                pass
+
+    def stats(self):
+        counters = ('hits', 'misses')
+        values = self.cache.get_many([
+            self.STATS_KEY_FORMAT.format(counter=counter)
+            for counter in counters])
+
+        return {
+            counter: values.get(
+                self.STATS_KEY_FORMAT.format(counter=counter), 0)
+            for counter in counters}
+
+
+response_cache = ResponseCache()
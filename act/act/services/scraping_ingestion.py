@@ -0,0 +1,149 @@
+# act/act/services/scraping_ingestion.py
+import logging
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils import timezone
+
+
+class ScrapingIngestion():
+    '''
+    Coalesces scraping writes that come with every client page view:
+
+    - head equal to the stored one (compared by hash, known hashes are kept
+      in shared cache) is not written at all;
+    - changed heads are buffered in process, the latest head of a path
+      wins;
+    - a path is written at most once per `SCRAPING_DEBOUNCE_WINDOW` seconds
+      among all processes. Head of a path written within the window is
+      delayed, not dropped: it is written once the window closes;
+    - buffer is flushed when request ends (see `flush_on_request_finished`)
+      with a single multi-row upsert of up to `SCRAPING_BUFFER_SIZE` heads
+      whose window is closed.
+
+    Worker processes run no background threads and may be recycled at any
+    time. Heads lost with a recycled process are not lost for good: stored
+    hash stays unchanged until flush, so the next page view submits the
+    head again. Heads carry their submission time, so older head flushed by
+    another process later never overwrites newer one
+    '''
+    HASH_KEY_FORMAT = 'scraping_head_hash:{path_hash}'
+    DEBOUNCE_KEY_FORMAT = 'scraping_debounce:{path_hash}'
+
+    STATUS_UNCHANGED = 'unchanged'
+    STATUS_BUFFERED = 'buffered'
+
+    DEFAULT_DEBOUNCE_WINDOW = 60
+    DEFAULT_BUFFER_SIZE = 50
+
+    def __init__(self, cache_alias='default'):
+        self.cache_alias = cache_alias
+
+        self.debounce_window = getattr(
+            settings, 'SCRAPING_DEBOUNCE_WINDOW',
+            self.DEFAULT_DEBOUNCE_WINDOW)
+        self.buffer_size = getattr(
+            settings, 'SCRAPING_BUFFER_SIZE', self.DEFAULT_BUFFER_SIZE)
+
+        self.buffer = {}
+        self.lock = threading.Lock()
+
+        self.logger = logging.getLogger('django')
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @property
+    def model(self):
+        return apps.get_model('website', 'Scraping')
+
+    def get_stored_head_hash(self, path_hash):
+        key = self.HASH_KEY_FORMAT.format(path_hash=path_hash)
+
+        head_hash = self.cache.get(key)
+        if head_hash is None:
+            head_hash = (
+                self.model.objects
+                .filter(path_hash=path_hash)
+                .values_list('head_hash', flat=True)
+                .first()) or ''
+            self.cache.set(key, head_hash, None)
+
+        return head_hash
+
+    def submit(self, path, head):
+        '''
+        Returns one of `STATUS_*` values
+        '''
+        path_hash = self.model.get_path_hash(path)
+
+        if self.get_stored_head_hash(path_hash) == (
+                self.model.get_head_hash(head)):
+            return self.STATUS_UNCHANGED
+
+        with self.lock:
+            self.buffer[path_hash] = (path, head, timezone.now())
+
+        return self.STATUS_BUFFERED
+
+    def claim_due(self):
+        '''
+        Takes heads of paths whose debounce window is closed out of buffer,
+        opening a new window for each of them
+        '''
+        with self.lock:
+            due = []
+
+            for path_hash in list(self.buffer):
+                if len(due) >= self.buffer_size:
+                    break
+
+                if self.cache.add(
+                        self.DEBOUNCE_KEY_FORMAT.format(path_hash=path_hash),
+                        True, self.debounce_window):
+                    due.append(self.buffer.pop(path_hash))
+
+        return due
+
+    def flush(self):
+        '''
+        Returns number of written heads, heads of paths within debounce
+        window are left in buffer
+        '''
+        if not self.buffer:
+            return 0
+
+        heads = self.claim_due()
+        if not heads:
+            return 0
+
+        try:
+            scrapings = self.model.objects.upsert_many(heads)
+        except Exception:
+            self.logger.exception(
+                'Flushing of %d scrapings failed', len(heads))
+            return 0
+
+        ''' Stored heads might be newer ones, hashes are read again '''
+        self.cache.delete_many([
+            self.HASH_KEY_FORMAT.format(path_hash=scraping.path_hash)
+            for scraping in scrapings])
+
+        return len(scrapings)
+
+
+scraping_ingestion = ScrapingIngestion()
+
+
+def flush_on_request_finished(sender, **kwargs):
+    '''
+    Connected to `request_finished`, so buffered heads are written after
+    response is sent, by any request this process serves
+    '''
+    if scraping_ingestion.flush():
+        ''' Connection opened after request-end cleanup is not left open '''
+        close_old_connections()
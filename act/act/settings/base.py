@@ -77,8 +77,10 @@ TEMPLATES = [
             ],
             'loaders': [
                 ('django.template.loaders.cached.Loader', [
-                    'django.template.loaders.filesystem.Loader',
-                    'django.template.loaders.app_directories.Loader',
+                    ('act.template_loaders.MJMLLoader', [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ]),
                 ]),
             ],
         },
@@ -167,6 +169,11 @@ try:
     from .packages.crontab import *
     from .packages.mjml import *
     from .packages.metadata import *
+    from .packages.cache import *
+    from .packages.images import *
+    from .packages.mail import *
+    from .packages.subscription import *
+    from .packages.crawlers import *
     '''
     LOGGING is built using base directory path, so in order to
     access base settings variables logging settings are returned
@@ -174,5 +181,10 @@ try:
     '''
     from .packages.logging import get_logging
     LOGGING = get_logging(BASE_DIR)
+    '''
+    Cache location is built using base directory path as well
+    '''
+    from .packages.cache import get_caches
+    CACHES = get_caches(BASE_DIR)
 except ImportError:
     print('No packages settings are defined.')
@@ -0,0 +1,32 @@
+# act/act/settings/packages/cache.py
+import os
+
+
+def get_caches(base_dir):
+    '''
+    File based cache is shared between uWSGI worker processes on a single
+    host, which is required for content versions to invalidate responses
+    cached by every worker. Switch `BACKEND` to
+    `django.core.cache.backends.memcached.MemcachedCache` (with `LOCATION`
+    set to memcached address) for multi-host setup, or to
+    `django.core.cache.backends.locmem.LocMemCache` for single process
+    development server
+    '''
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(base_dir, 'cache'),
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        },
+    }
+
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 60 * 24
+# Hit and miss counters are shared once per interval, in seconds
+RESPONSE_CACHE_STATS_INTERVAL = 60
+
+CRAWLER_HEAD_CACHE_SIZE = 256
+CRAWLER_HEAD_CACHE_TIMEOUT = 60 * 5
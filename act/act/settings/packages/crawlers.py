@@ -0,0 +1,17 @@
+# act/act/settings/packages/crawlers.py
+
+# User agent tokens of link preview crawlers, served scraped `<head>` in
+# addition to Facebook, VK and Twitter ones. Search engine bots render
+# client side pages themselves and should not be listed here
+CRAWLER_USER_AGENTS = [
+    'telegrambot',
+    'slackbot',
+    'slack-imgproxy',
+    'linkedinbot',
+    'whatsapp',
+    'discordbot',
+]
+
+# Scraping writes coalescing, see `act.services.scraping_ingestion`
+SCRAPING_DEBOUNCE_WINDOW = 60
+SCRAPING_BUFFER_SIZE = 50
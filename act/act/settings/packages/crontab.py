@@ -1,4 +1,9 @@
 # act_project/act/act/settings/packages/crontab.py
 CRONJOBS = [
     ('0 6 * * *', 'django.core.management.call_command', ['mailing']),
+    ('* * * * *', 'django.core.management.call_command', [
+        'build_centre_documents']),
+    ('* * * * *', 'django.core.management.call_command', [
+        'render_image_variations']),
+    ('* * * * *', 'django.core.management.call_command', ['send_outbox']),
 ]
@@ -0,0 +1,14 @@
+# act/act/settings/packages/images.py
+'''
+Image variations are rendered in background by `render_image_variations`
+command, the original image is served until they are ready
+'''
+IMAGE_VARIATIONS_ASYNC = True
+IMAGE_VARIATION_JOB_MODEL = 'website.ImageVariationJob'
+
+# Process pool size, defaults to number of processors
+IMAGE_VARIATION_WORKERS = None
+
+# Delay before the first retry of failed job, in seconds, doubled with every
+# next attempt
+IMAGE_VARIATION_RETRY_DELAY = 60
@@ -0,0 +1,15 @@
+# act/act/settings/packages/mail.py
+'''
+Transactional e-mails are queued to outbox and delivered in background by
+`send_outbox` command
+'''
+MAIL_OUTBOX_MODEL = 'subscription.OutgoingEmail'
+
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+
+# Delay before the first retry in seconds, doubled on every next attempt
+MAIL_OUTBOX_RETRY_DELAY = 60
+
+# Overrides EMAIL_BACKEND for outbox delivery, e.g. with
+# 'django.core.mail.backends.locmem.EmailBackend' in tests
+MAIL_OUTBOX_EMAIL_BACKEND = None
@@ -1,3 +1,8 @@
 # act_project/act/act/settings/packages/mjml.py
 MJML_BACKEND_MODE = 'cmd'
 MJML_EXEC_CMD = '/usr/local/bin/mjml'
+
+# `{% mjml %}` blocks are precompiled by `act.template_loaders.MJMLLoader`
+# and cached on disk within `MJML_CACHE_DIR` (`cache/mjml` within BASE_DIR
+# when not set)
+MJML_CACHE_DIR = None
@@ -0,0 +1,10 @@
+# act_project/act/act/settings/packages/subscription.py
+# Number of e-mails sent and recorded as delivered at once during mailing
+MAILING_BATCH_SIZE = 100
+
+# Messages per second during mailing, `None` for no limit
+MAILING_RATE_LIMIT = 10
+
+# Number of SMTP connections mailing is sent over in parallel, rate limit
+# is shared between them
+MAILING_CONNECTIONS = 1
@@ -0,0 +1,168 @@
+# act/act/template_loaders.py
+import os
+import re
+import hashlib
+import logging
+
+from django.conf import settings
+from django.template.base import Origin, tag_re
+from django.template.loaders.base import Loader as BaseLoader
+from django.utils.encoding import force_text
+
+from mjml.tools import mjml_render
+
+
+class MJMLLoader(BaseLoader):
+    '''
+    Wraps other loaders and precompiles `{% mjml %}` blocks of loaded
+    templates, so that MJML to HTML compilation (a Node process spawn in
+    `cmd` mode) happens once per template source, not on every render.
+
+    Django tags, variables and comments within a block are swapped with
+    tokens, block is compiled and tokens are swapped back, leaving a plain
+    Django template. Block tags placed between MJML elements are wrapped in
+    `<mj-raw>` to be kept in place. Compiled blocks are cached on disk by
+    source hash in `MJML_CACHE_DIR` (`cache/mjml` within `BASE_DIR` by
+    default). If a block could not be compiled or some token got lost, the
+    template is left as it is and is compiled on render by `{% mjml %}` tag
+    '''
+    TOKEN_FORMAT = 'mjmltoken{index}x{salt}'
+
+    block_re = re.compile(
+        r'{%\s*mjml\s*%}(?P<source>.*?){%\s*endmjml\s*%}', re.DOTALL)
+
+    ''' Elements, content of which is HTML rather than MJML '''
+    ending_tag_re = re.compile(
+        r'<(?P<closing>/?)(?P<name>mj-text|mj-button|mj-table|mj-raw|'
+        r'mj-style|mj-title|mj-preview)\b[^>]*?(?P<self_closing>/?)>')
+
+    def __init__(self, engine, loaders):
+        super(MJMLLoader, self).__init__(engine)
+
+        self.loaders = engine.get_template_loaders(loaders)
+        self.cache_dir = getattr(settings, 'MJML_CACHE_DIR', None) or (
+            os.path.join(settings.BASE_DIR, 'cache', 'mjml'))
+
+        self.logger = logging.getLogger('django.template')
+
+    def get_template_sources(self, template_name, template_dirs=None):
+        for loader in self.loaders:
+            args = [template_name]
+            if template_dirs is not None:
+                args.append(template_dirs)
+
+            for source_origin in loader.get_template_sources(*args):
+                ''' Contents should be read by this loader, not by inner one '''
+                origin = Origin(
+                    name=source_origin.name,
+                    template_name=source_origin.template_name,
+                    loader=self)
+                origin.source_origin = source_origin
+
+                yield origin
+
+    def get_contents(self, origin):
+        source_origin = origin.source_origin
+        contents = source_origin.loader.get_contents(source_origin)
+
+        if not self.block_re.search(contents):
+            return contents
+
+        try:
+            return self.block_re.sub(self.compile_block, contents)
+        except (RuntimeError, OSError, ValueError) as e:
+            self.logger.warning(
+                'MJML precompilation of %s failed: %r', origin.name, e)
+            return contents
+
+    def reset(self):
+        for loader in self.loaders:
+            try:
+                loader.reset()
+            except AttributeError:
+                pass
+
+    @staticmethod
+    def is_within_tag(source, position):
+        return source.rfind('<', 0, position) > source.rfind('>', 0, position)
+
+    def is_within_ending_tag(self, source, position):
+        last_match = None
+        for match in self.ending_tag_re.finditer(source, 0, position):
+            last_match = match
+
+        return bool(
+            last_match and
+            not last_match.group('closing') and
+            not last_match.group('self_closing'))
+
+    def tokenize(self, source):
+        '''
+        Returns source with Django syntax swapped with tokens and
+        `{token: Django syntax}` dictionary
+        '''
+        salt = hashlib.sha1(source.encode()).hexdigest()[:8]
+
+        tokens = {}
+        parts = []
+        position = 0
+
+        for index, match in enumerate(tag_re.finditer(source)):
+            token = self.TOKEN_FORMAT.format(index=index, salt=salt)
+            tokens[token] = match.group(0)
+
+            is_block_tag = match.group(0).startswith('{%')
+            if is_block_tag and not (
+                    self.is_within_tag(source, match.start()) or
+                    self.is_within_ending_tag(source, match.start())):
+                token_markup = '<mj-raw>%s</mj-raw>' % token
+            else:
+                token_markup = token
+
+            parts.append(source[position:match.start()])
+            parts.append(token_markup)
+            position = match.end()
+
+        parts.append(source[position:])
+
+        return ''.join(parts), tokens
+
+    def get_cache_path(self, source):
+        digest = hashlib.sha1(source.encode()).hexdigest()
+        return os.path.join(self.cache_dir, '%s.html' % digest)
+
+    def compile(self, source):
+        '''
+        Compiles MJML source once per source hash
+        '''
+        cache_path = self.get_cache_path(source)
+
+        if os.path.exists(cache_path):
+            with open(cache_path, encoding='utf-8') as cached:
+                return cached.read()
+
+        ''' Command line backend returns undecoded output '''
+        html = force_text(mjml_render(source))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        ''' Written atomically, as loader could run in several processes '''
+        temporary_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        with open(temporary_path, 'w', encoding='utf-8') as cached:
+            cached.write(html)
+        os.replace(temporary_path, cache_path)
+
+        return html
+
+    def compile_block(self, match):
+        source, tokens = self.tokenize(match.group('source'))
+
+        html = self.compile(source)
+
+        for token, syntax in tokens.items():
+            if html.count(token) != 1:
+                raise ValueError('Token of %r got lost' % syntax)
+
+            html = html.replace(token, syntax)
+
+        return html
@@ -1,6 +1,10 @@
 # act_project/act/act/utils.py
+from itertools import islice
+from urllib.parse import urlparse
+
 from django.core.exceptions import ImproperlyConfigured
 from django.conf import settings
+from django.http import HttpRequest
 
 
 def get_default_URL():
@@ -12,3 +16,41 @@ def get_default_URL():
         raise ImproperlyConfigured('Default URL setting is not set.')
 
     return default_url
+
+
+class DefaultURLRequest(HttpRequest):
+    '''
+    Request addressed to DEFAULT_URL setting. Used to build absolute URIs
+    (e.g. in serializers) outside of request-response cycle
+    '''
+    def __init__(self, path='/'):
+        super(DefaultURLRequest, self).__init__()
+
+        default_url = urlparse(get_default_URL())
+
+        self.path = self.path_info = path
+        self.method = 'GET'
+        self.META['HTTP_HOST'] = default_url.netloc
+
+        self._scheme = default_url.scheme or 'http'
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def get_default_request(path='/'):
+    return DefaultURLRequest(path)
+
+
+def chunked(iterable, size):
+    '''
+    Lazily splits iterable into lists of `size` items
+    '''
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+
+        yield chunk
@@ -1,5 +1,8 @@
 # act_project/act/act/validators.py
 import os
+import zipfile
+import threading
+
 import magic
 
 from django.conf import settings
@@ -11,8 +14,74 @@ from django.utils.deconstruct import deconstructible
 from django.template.defaultfilters import filesizeformat
 
 
+_magic = None
+_magic_lock = threading.Lock()
+
+ZIP_CONTENT_TYPES = ('application/zip', 'application/x-zip-compressed')
+
+''' Office Open XML documents by directory of their main part '''
+OOXML_CONTENT_TYPES = {
+    'word/': (
+        'application/'
+        'vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    'xl/': (
+        'application/'
+        'vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'ppt/': (
+        'application/'
+        'vnd.openxmlformats-officedocument.presentationml.presentation'),
+}
+
+
+def get_content_type(header):
+    '''
+    Sniffs MIME type from file header with a `magic.Magic` instance loaded
+    once per process. libmagic handle is not thread safe, hence the lock
+    '''
+    global _magic
+
+    with _magic_lock:
+        if _magic is None:
+            _magic = magic.Magic(mime=True)
+
+        return _magic.from_buffer(header)
+
+
+def get_ooxml_content_type(file):
+    '''
+    Office Open XML documents are zip containers, recognized by libmagic
+    only if their parts are found within sniffed header. Parts are listed
+    from zip central directory instead, without reading the whole file.
+    Returns `None` for other zip files
+    '''
+    try:
+        with zipfile.ZipFile(file) as container:
+            names = container.namelist()
+    except (zipfile.BadZipFile, OSError):
+        return None
+    finally:
+        file.seek(0)
+
+    if '[Content_Types].xml' not in names:
+        return None
+
+    for name in names:
+        for directory, content_type in OOXML_CONTENT_TYPES.items():
+            if name.startswith(directory):
+                return content_type
+
+    return None
+
+
 @deconstructible
 class FileContentTypeValidator(object):
+    '''
+    Size is checked first, so oversized files are rejected without being
+    read. Content type is detected from a bounded header of a file, zip
+    containers are told apart by their contents
+    '''
+    HEADER_SIZE = 8192
+
     messages = {
         'content_type': _(
             "Завантажений файл має недозволений тип '%(content_type)s'. "),
@@ -36,15 +105,6 @@ class FileContentTypeValidator(object):
             self.code = code
 
     def __call__(self, value):
-        if self.allowed_content_types:
-            content_type = magic.from_buffer(value.read(), mime=True)
-            if content_type not in self.allowed_content_types:
-                raise ValidationError(
-                    self.messages['content_type'],
-                    code=self.codes['content_type'],
-                    params={'content_type': content_type}
-                )
-
         if self.max_size is not None:
             if value.size > self.max_size:
                 raise ValidationError(
@@ -53,5 +113,21 @@ class FileContentTypeValidator(object):
                     params={'max_size': filesizeformat(self.max_size)}
                 )
 
+        if self.allowed_content_types:
+            value.seek(0)
+            header = value.read(self.HEADER_SIZE)
+            value.seek(0)
+
+            content_type = get_content_type(header)
+            if content_type in ZIP_CONTENT_TYPES:
+                content_type = get_ooxml_content_type(value) or content_type
+
+            if content_type not in self.allowed_content_types:
+                raise ValidationError(
+                    self.messages['content_type'],
+                    code=self.codes['content_type'],
+                    params={'content_type': content_type}
+                )
+
     def __eq__(self, other):
         return isinstance(other, FileContentTypeValidator)
@@ -1,9 +1,96 @@
 # act_project/act/act/views_api.py
+from django.views.decorators.http import condition
+
 from rest_framework.response import Response
 
 from rest_framework.decorators import api_view
 from rest_framework.reverse import reverse
 
+from .services.content_version import content_version
+from .services.response_cache import response_cache
+
+
+class ConditionalResponseMixin():
+    '''
+    Answers conditional GET requests with `304 Not Modified` before the view
+    is executed. Entity tag is built from content versions of `cache_models`
+    (defaults to the model of view's `queryset`) and `Last-Modified` from the
+    time of their latest change, so every model that takes part in
+    serialization, including nested ones, should be listed there
+    '''
+    cache_models = ()
+
+    content_digest = None
+
+    def get_cache_models(self):
+        if self.cache_models:
+            return self.cache_models
+
+        queryset = getattr(self, 'queryset', None)
+
+        return (queryset.model, ) if queryset is not None else ()
+
+    def get_etag(self, request, *args, **kwargs):
+        return self.content_digest
+
+    def get_last_modified(self, request, *args, **kwargs):
+        return content_version.get_modified_at(self.get_cache_models())
+
+    def is_conditional(self, request):
+        return (
+            request.method in ('GET', 'HEAD') and
+            bool(self.get_cache_models()))
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_conditional(request):
+            return super(ConditionalResponseMixin, self).dispatch(
+                request, *args, **kwargs)
+
+        versions = content_version.get_many(self.get_cache_models())
+        self.content_digest = response_cache.get_digest(
+            request, kwargs, versions)
+
+        conditional_dispatch = condition(
+            etag_func=self.get_etag,
+            last_modified_func=self.get_last_modified,
+        )(self.dispatch_modified)
+
+        return conditional_dispatch(request, *args, **kwargs)
+
+    def dispatch_modified(self, request, *args, **kwargs):
+        '''
+        Called only if client's copy of the resource is missing or outdated
+        '''
+        return super(ConditionalResponseMixin, self).dispatch(
+            request, *args, **kwargs)
+
+
+class CachedResponseMixin(ConditionalResponseMixin):
+    '''
+    Serves GET requests from response cache, keyed by the same content
+    digest that is used as an entity tag for conditional requests
+    '''
+    def dispatch_modified(self, request, *args, **kwargs):
+        if request.method != 'GET':
+            return super(CachedResponseMixin, self).dispatch_modified(
+                request, *args, **kwargs)
+
+        key = response_cache.get_key(
+            self.__class__.__name__, self.content_digest)
+
+        response = response_cache.get(key)
+        if response is not None:
+            return response
+
+        response = super(CachedResponseMixin, self).dispatch_modified(
+            request, *args, **kwargs)
+
+        if response.status_code == 200:
+            response.render()
+            response_cache.set(key, response)
+
+        return response
+
 
 @api_view(['GET'])
 def api_root(request, format=None):
@@ -1,7 +1,55 @@
 # act_project/act/metadata/apps.py
-from django.apps import AppConfig
+from django.apps import AppConfig, apps
+from django.db import transaction
+from django.db.models.signals import post_save
+
+
+def get_variations_field_names(model):
+    return frozenset(
+        field.variations_field
+        for field in model._meta.get_fields()
+        if getattr(field, 'variations_field', None))
+
+
+def precompute_head(sender, instance, update_fields=None, **kwargs):
+    '''
+    Saves touching nothing but image variation maps do not change head
+    '''
+    from .heads import head_renderer
+
+    if update_fields and update_fields <= get_variations_field_names(sender):
+        return
+
+    transaction.on_commit(lambda: head_renderer.precompute(instance))
 
 
 class MetadataConfig(AppConfig):
     name = 'metadata'
     verbose_name = 'Метадані'
+
+    def ready(self):
+        from act.services.content_version import track_content_versions
+
+        from .settings import settings
+
+        track_content_versions(self)
+
+        '''
+        Heads of objects are rendered for crawlers once they are saved.
+        Content versions of supported models are tracked first, so heads are
+        keyed by bumped versions even outside of transactions. Tracking is
+        connected by `dispatch_uid`, so it is not duplicated once apps of
+        supported models become ready
+        '''
+        supported_models = settings.SUPPORTED_MODELS.values()
+
+        for app_label in set(app_label for app_label, _ in supported_models):
+            track_content_versions(apps.get_app_config(app_label))
+
+        for app_label, model_name in supported_models:
+            model = apps.get_model(app_label, model_name)
+
+            post_save.connect(
+                precompute_head,
+                sender=model,
+                dispatch_uid='precompute_head_%s' % model._meta.label_lower)
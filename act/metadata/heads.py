@@ -0,0 +1,177 @@
+# act_project/act/metadata/heads.py
+import re
+import hashlib
+from urllib.parse import urljoin
+
+from django.apps import apps
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from django.template.loader import render_to_string
+
+from act.services.content_version import content_version
+from act.utils import get_default_URL
+
+from .models import Metadata, OpenGraph, TwitterCard
+from .settings import settings
+from .utils import get_metadata_models
+
+
+class HeadRenderer():
+    '''
+    Renders `<head>` metadata tags of supported model objects on the server
+    side. Object is resolved from front end application path by its model's
+    `STATIC_PATH_FORMAT`, the format field holding object id is named by
+    model's `STATIC_PATH_LOOKUP` (`id` by default). Rendered heads are
+    kept in shared cache keyed by content versions of metadata, of object's
+    model and of models its metadata is built from, the same way API
+    responses are
+    '''
+    KEY_FORMAT = 'metadata_head:{path}:{versions}'
+
+    DEFAULT_TIMEOUT = 60 * 60 * 24
+
+    field_re = re.compile(r'{(?P<name>\w+)}')
+
+    def __init__(self, cache_alias='default', timeout=None):
+        self.cache_alias = cache_alias
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+
+        self._patterns = None
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def compile_path_format(self, path_format):
+        parts = []
+        position = 0
+
+        for match in self.field_re.finditer(path_format):
+            parts.append(re.escape(path_format[position:match.start()]))
+            parts.append(r'(?P<%s>[^/]+)' % match.group('name'))
+            position = match.end()
+
+        parts.append(re.escape(path_format[position:]))
+
+        return re.compile(r'^%s$' % ''.join(parts))
+
+    def get_patterns(self):
+        '''
+        Returns `(url name, model, compiled path format, lookup)` tuples
+        '''
+        if self._patterns is None:
+            self._patterns = []
+
+            for url_name, (app_label, model_name) in sorted(
+                    settings.SUPPORTED_MODELS.items()):
+                model = apps.get_model(app_label, model_name)
+
+                path_format = getattr(model, 'STATIC_PATH_FORMAT', None)
+                if path_format is None:
+                    continue
+
+                self._patterns.append((
+                    url_name,
+                    model,
+                    self.compile_path_format(path_format.strip('/')),
+                    getattr(model, 'STATIC_PATH_LOOKUP', 'id')))
+
+        return self._patterns
+
+    def resolve(self, path):
+        '''
+        Returns `(url name, model, id)` of object path belongs to or `None`
+        '''
+        path = path.strip('/')
+
+        for url_name, model, pattern, lookup in self.get_patterns():
+            match = pattern.match(path)
+            if match is None:
+                continue
+
+            object_id = match.group(lookup)
+            if object_id.isdigit():
+                return url_name, model, int(object_id)
+
+        return None
+
+    @staticmethod
+    def get_models(model):
+        ''' Models head of `model` object is rendered from '''
+        return (Metadata, ) + get_metadata_models(model)
+
+    def get_key(self, path, model):
+        versions = content_version.get_many(self.get_models(model))
+
+        digest = hashlib.md5('|'.join(sorted(
+            '%s=%s' % (model._meta.label_lower, version)
+            for model, version in versions.items())).encode()).hexdigest()
+
+        return self.KEY_FORMAT.format(
+            path=hashlib.sha1(path.strip('/').encode()).hexdigest(),
+            versions=digest)
+
+    def get_head(self, path):
+        '''
+        Returns rendered head of object path belongs to, `None` if path
+        does not belong to any object. Rendered heads are cached
+        '''
+        resolved = self.resolve(path)
+        if resolved is None:
+            return None
+
+        key = self.get_key(path, resolved[1])
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached or None
+
+        head = self.render(*resolved)
+
+        ''' Missing objects are cached as empty string '''
+        self.cache.set(key, head or '', self.timeout)
+
+        return head
+
+    @staticmethod
+    def get_image_URL(image, variation):
+        if not image:
+            return None
+
+        image = getattr(image, variation, None) or image
+
+        return urljoin(get_default_URL(), image.url)
+
+    def render(self, url_name, model, object_id):
+        try:
+            master_metadata = Metadata.objects.get_cached(url_name)
+            instance = model._default_manager.get(id=object_id)
+        except ObjectDoesNotExist:
+            return None
+
+        metadata = Metadata.build_metadata_from_dict(
+            master_metadata, instance.get_metadata())
+
+        metadata.provide_open_graph(
+            open_graph_type=OpenGraph.TYPE_ARTICLE)
+        metadata.provide_twitter_card(
+            twitter_card=TwitterCard.CARD_SUMMARY_LARGE_IMAGE)
+
+        return render_to_string('metadata/head.html', {
+            'metadata': metadata,
+            'open_graph_image': self.get_image_URL(
+                metadata.image, 'open_graph'),
+            'twitter_card_image': self.get_image_URL(
+                metadata.image, 'twitter_card'),
+        })
+
+    def precompute(self, instance):
+        '''
+        Renders and caches head of saved instance ahead of crawler requests
+        '''
+        get_static_path = getattr(instance, 'get_static_path', None)
+        if get_static_path is not None:
+            self.get_head(get_static_path())
+
+
+head_renderer = HeadRenderer()
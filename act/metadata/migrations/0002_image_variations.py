@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import act.fields
+import act.services.file_name
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='metadata',
+            name='image_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації зображення'),
+        ),
+        migrations.AlterField(
+            model_name='metadata',
+            name='image',
+            field=act.fields.VariationMapStdImageField(upload_to=act.services.file_name.RandomFileName('metadata/images/'), variations_field='image_variations', verbose_name='Зображення'),
+        ),
+    ]
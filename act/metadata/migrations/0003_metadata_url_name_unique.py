@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def delete_duplicate_url_names(apps, schema_editor):
+    '''
+    Keeps the latest of rows sharing `url_name`
+    '''
+    Metadata = apps.get_model('metadata', 'Metadata')
+
+    kept = set()
+    for metadata in Metadata.objects.order_by('-id').only(
+            'id', 'url_name').iterator():
+        if metadata.url_name in kept:
+            Metadata.objects.filter(id=metadata.id).delete()
+            continue
+
+        kept.add(metadata.url_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0002_image_variations'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            delete_duplicate_url_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='metadata',
+            name='url_name',
+            field=models.CharField(max_length=100, unique=True, verbose_name='Роутінг'),
+        ),
+    ]
@@ -2,8 +2,12 @@
 class MetadataMixin():
     '''
     Acts as interface marker to make sure that class using mixin
-    implements method which returns metadata dictionary
+    implements method which returns metadata dictionary. Models other than
+    its own that `get_metadata()` reads are listed by
+    `METADATA_RELATED_MODELS`, so metadata is keyed by their content versions
     '''
+    METADATA_RELATED_MODELS = ()
+
     def get_metadata(self):
         message = "`{}` should implement `get_metadata()` method".format(
             self.__class__.__name__)
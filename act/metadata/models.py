@@ -1,14 +1,16 @@
 # act_project/act/metadata/models.py
+import copy
+import threading
 from urllib.parse import urljoin
 
 from django.db import models, transaction
 from django.core.exceptions import ObjectDoesNotExist
 
-from stdimage.models import StdImageField
-
+from act.fields import VariationMapStdImageField
 # Notice overridden transmeta import!
 from act.services.transmeta import TransMeta
 from act.services.file_name import RandomFileName
+from act.services.content_version import content_version
 from act.utils import get_default_URL
 
 from .utils import truncate_text
@@ -21,6 +23,45 @@ def update_with_metadata_variations(variations):
     return variations
 
 
+class MetadataManager(models.Manager):
+    '''
+    Metadata table is tiny and rarely edited, so all the rows are kept in
+    process memory by `url_name`, loaded with a single query and reloaded
+    once Metadata content version changes
+    '''
+    _table = (None, {})
+    _lock = threading.Lock()
+
+    def get_table(self):
+        version = content_version.get(self.model)
+
+        table_version, table = self._table
+        if table_version == version:
+            return table
+
+        with self._lock:
+            table_version, table = self._table
+            if table_version == version:
+                return table
+
+            table = {
+                metadata.url_name: metadata
+                for metadata in super(MetadataManager, self).get_queryset()}
+            MetadataManager._table = (version, table)
+
+        return table
+
+    def get_cached(self, url_name):
+        '''
+        Returns a copy of cached row, safe to modify
+        '''
+        try:
+            return copy.copy(self.get_table()[url_name])
+        except KeyError as e:
+            raise self.model.DoesNotExist(
+                'Metadata by given `url_name` does not exist') from e
+
+
 class Metadata(models.Model, metaclass=TransMeta):
     IMAGE_PATH = 'metadata/images/'
 
@@ -29,16 +70,21 @@ class Metadata(models.Model, metaclass=TransMeta):
         'twitter_card': {'width': 1120, 'height': 600, 'crop': True},
     }
 
-    image = StdImageField(
+    image = VariationMapStdImageField(
         'Зображення',
         upload_to=RandomFileName(IMAGE_PATH),
-        variations=variations)
+        variations=variations,
+        variations_field='image_variations')
+    image_variations = models.TextField(
+        'Варіації зображення', blank=True, editable=False)
 
-    url_name = models.CharField('Роутінг', max_length=100)
+    url_name = models.CharField('Роутінг', max_length=100, unique=True)
     title = models.CharField('Назва сторінки', max_length=100)
     description = models.CharField('Опис сторінки', max_length=250)
     robots = models.CharField('Інформація для ботів', max_length=100)
 
+    objects = MetadataManager()
+
     class Meta:
         verbose_name = 'Метадані'
         verbose_name_plural = 'Метадані'
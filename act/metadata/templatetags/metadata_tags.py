@@ -13,7 +13,9 @@ def provide_metadata(context):
     if request.resolver_match:
         url_name = request.resolver_match.url_name
 
-        # Returns first matching object or None.
-        return Metadata.objects.filter(url_name=url_name).first()
+        try:
+            return Metadata.objects.get_cached(url_name)
+        except Metadata.DoesNotExist:
+            return None
     else:
         return None
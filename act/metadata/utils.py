@@ -1,4 +1,6 @@
 # act_project/act/metadata/utils.py
+from html import unescape
+
 from django.apps import apps
 from django.utils.html import strip_tags
 
@@ -9,6 +11,19 @@ def is_supported_model(url_name):
     return url_name in settings.SUPPORTED_MODELS
 
 
+def get_supported_model(url_name):
+    app_label, model_name = settings.SUPPORTED_MODELS[url_name]
+
+    return apps.get_model(app_label, model_name)
+
+
+def get_metadata_models(model):
+    '''
+    Returns model and models its objects metadata is built from
+    '''
+    return (model, ) + tuple(getattr(model, 'METADATA_RELATED_MODELS', ()))
+
+
 def get_supported_model_instance(url_name, id):
     if not is_supported_model(url_name):
         raise KeyError('Model by given `url_name` is not supported')
@@ -25,7 +40,11 @@ def get_supported_model_instance(url_name, id):
 
 
 def truncate_text(text, length):
-    text = strip_tags(text)
+    '''
+    Truncates plain text of HTML: tags are stripped, entities are unescaped
+    and whitespace (including non-breaking one) is collapsed
+    '''
+    text = ' '.join(unescape(strip_tags(text)).split())
 
     if len(text) > length:
         text = "{}...".format(text[:length].rsplit(' ', 1)[0].rstrip('.'))
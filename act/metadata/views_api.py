@@ -1,33 +1,52 @@
 # act_project/act/metadata/views_api.py
 from django.core.exceptions import ObjectDoesNotExist
 from django.http import Http404
-from django.shortcuts import get_object_or_404
 
 from rest_framework.generics import (
     ListAPIView, RetrieveAPIView,
 )
 
+from act.views_api import CachedResponseMixin
+
 from .models import (
     Metadata, OpenGraph, TwitterCard,
 )
 from .serializers import (
     MetadataListSerializer, MetadataDetailSerializer,
 )
-from .utils import get_supported_model_instance
+from .utils import (
+    is_supported_model, get_supported_model, get_supported_model_instance,
+    get_metadata_models,
+)
+
+
+def get_cached_metadata(view):
+    '''
+    Cached counterpart of `GenericAPIView.get_object()` for `url_name`
+    lookup, returned instance is a copy and can be modified
+    '''
+    try:
+        metadata = Metadata.objects.get_cached(view.kwargs['url_name'])
+    except Metadata.DoesNotExist:
+        raise Http404('Metadata does not exist')
 
+    view.check_object_permissions(view.request, metadata)
 
-class MetadataList(ListAPIView):
+    return metadata
+
+
+class MetadataList(CachedResponseMixin, ListAPIView):
     serializer_class = MetadataListSerializer
     queryset = Metadata.objects.all()
 
 
-class MetadataDetail(RetrieveAPIView):
+class MetadataDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = MetadataDetailSerializer
     queryset = Metadata.objects.all()
     lookup_field = 'url_name'
 
     def get_object(self):
-        metadata = super(MetadataDetail, self).get_object()
+        metadata = get_cached_metadata(self)
 
         metadata.provide_open_graph(
             open_graph_type=OpenGraph.TYPE_WEBSITE)
@@ -37,13 +56,25 @@ class MetadataDetail(RetrieveAPIView):
         return metadata
 
 
-class MetadataDetailOnObject(RetrieveAPIView):
+class MetadataDetailOnObject(CachedResponseMixin, RetrieveAPIView):
     serializer_class = MetadataDetailSerializer
     queryset = Metadata.objects.all()
     lookup_field = 'url_name'
 
+    def get_cache_models(self):
+        '''
+        Object metadata may be built from object's relations as well, so
+        responses depend on models listed by object's model
+        '''
+        url_name = self.kwargs['url_name']
+        if not is_supported_model(url_name):
+            return (Metadata, )
+
+        return (Metadata, ) + get_metadata_models(
+            get_supported_model(url_name))
+
     def get_object(self):
-        master_metadata = super(MetadataDetailOnObject, self).get_object()
+        master_metadata = get_cached_metadata(self)
 
         try:
             instance = get_supported_model_instance(
@@ -15,9 +15,17 @@ class Command(BaseCommand):
     def get_mailing(self):
         return Mailing.objects.latest_mailing()
 
-    def record_mailing(self, subscribers):
+    def get_unfinished_mailing(self):
+        return Mailing.objects.unfinished_mailing()
+
+    def start_mailing(self):
         mailing = Mailing(mailing_at=datetime.datetime.now())
         mailing.save()
 
-        mailing.subscribers.set(subscribers)
-        mailing.save()
+        return mailing
+
+    def get_undelivered_subscribers(self, mailing):
+        return Subscriber.objects.iter_active_undelivered(mailing)
+
+    def record_delivered(self, mailing, subscribers):
+        mailing.record_delivered(subscribers)
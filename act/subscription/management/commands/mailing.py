@@ -1,7 +1,7 @@
 # act_project/act/website/management/commands/mailing.py
 import logging
 
-from act.services.mailer import MailerMixin
+from act.services.mailer import MailerMixin, RecipientsDeferred
 
 from website.models import Event
 
@@ -27,20 +27,48 @@ class Command(MailerMixin, MailingCommand):
         return events
 
     def handle(self, *args, **options):
-        subscribers = self.get_subscribers()
-        if not subscribers.exists():
-            return
+        '''
+        Interrupted mailing is resumed for subscribers it was not delivered
+        to yet, otherwise a new one is started. Subscribers are streamed
+        and recorded in chunks, events are fetched once
+        '''
+        mailing = self.get_unfinished_mailing()
 
-        mailing = self.get_mailing()
+        events = list(self.get_events(self.get_mailing()))
+        if mailing is None:
+            if not self.get_subscribers().exists():
+                return
 
-        events = self.get_events(mailing)
-        if not events.exists():
-            return
+            if not events:
+                return
+
+            mailing = self.start_mailing()
+
+        subscribers = self.get_undelivered_subscribers(mailing)
 
         try:
-            self.serializer.send_subscription_emails(subscribers, events)
+            for delivered in self.serializer.iter_subscription_emails(
+                    subscribers, events):
+                self.record_delivered(mailing, delivered)
+        except RecipientsDeferred as e:
+            ''' Mailing is resumed for deferred recipients by the next run '''
+            self.logger.warning(str(e))
+            return
         except Exception as e:
             self.logger.error(repr(e))
             return
+        finally:
+            self.log_throughput()
+
+        mailing.complete()
+
+    def log_throughput(self):
+        sender = getattr(self.serializer, 'sender', None)
+        if sender is None:
+            return
 
-        self.record_mailing(subscribers)
+        for index, throughput in enumerate(sender.get_throughput()):
+            self.logger.info(
+                'Connection %d: %.1f messages/sec, %d refused, %d deferred',
+                index, throughput, sender.metrics[index]['refused'],
+                sender.metrics[index]['deferred'])
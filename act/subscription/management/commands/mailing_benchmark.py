@@ -0,0 +1,64 @@
+# act_project/act/subscription/management/commands/mailing_benchmark.py
+import time
+
+from django.core.mail import EmailMessage
+from django.core.management.base import BaseCommand
+
+from act.services.mailer import PooledSender
+from act.utils import chunked
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures messages per second sent by pools of SMTP connections of '
+        'different sizes. Run it against a local debugging SMTP server, '
+        'e.g. `python -m aiosmtpd -n -l localhost:1025`')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pool-sizes', type=int, nargs='+', default=[1, 2, 4, 8],
+            help='Numbers of parallel connections')
+        parser.add_argument(
+            '--messages', type=int, default=1000,
+            help='Number of messages per pool size')
+        parser.add_argument(
+            '--batch-size', type=int, default=100)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--port', type=int, default=1025)
+
+    @staticmethod
+    def build_messages(number):
+        for index in range(number):
+            message = EmailMessage(
+                'Benchmark %d' % index,
+                '<p>%s</p>' % ('Lorem ipsum dolor sit amet. ' * 200),
+                'benchmark@localhost',
+                ['subscriber%d@localhost' % index])
+            message.content_subtype = 'html'
+
+            yield index, message
+
+    def handle(self, *args, **options):
+        self.stdout.write('{:>10} {:>14} {:>10} {:>10}'.format(
+            'pool size', 'messages/sec', 'refused', 'deferred'))
+
+        for pool_size in options['pool_sizes']:
+            sender = PooledSender(
+                pool_size,
+                backend='django.core.mail.backends.smtp.EmailBackend',
+                connection_kwargs={
+                    'host': options['host'], 'port': options['port']})
+
+            batches = chunked(
+                self.build_messages(options['messages']),
+                options['batch_size'])
+
+            started_at = time.monotonic()
+            sent = sum(len(processed) for processed in sender.send(batches))
+            seconds = time.monotonic() - started_at
+
+            self.stdout.write('{:>10} {:>14.1f} {:>10} {:>10}'.format(
+                pool_size,
+                sent / seconds,
+                sum(metrics['refused'] for metrics in sender.metrics),
+                sum(metrics['deferred'] for metrics in sender.metrics)))
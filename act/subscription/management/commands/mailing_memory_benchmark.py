@@ -0,0 +1,72 @@
+# act_project/act/subscription/management/commands/mailing_memory_benchmark.py
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from act.utils import chunked
+
+from ...models import Subscriber, Mailing
+from ...settings import settings as subscription_settings
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures peak memory of traversing subscribers and recording them '
+        'within a mailing (without sending e-mails) for growing numbers of '
+        'subscribers. Subscribers are created within a transaction that is '
+        'rolled back')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', type=int, nargs='+',
+            default=[1000, 10000, 100000, 1000000],
+            help='Numbers of subscribers')
+
+    @staticmethod
+    def create_subscribers(size):
+        subscribers = (
+            Subscriber(
+                email='subscriber%d@localhost' % index,
+                is_active=True,
+                checkout_hash=Subscriber.CheckoutHash.generate())
+            for index in range(size))
+
+        for chunk in chunked(subscribers, 1000):
+            Subscriber.objects.bulk_create(chunk)
+
+    @staticmethod
+    def traverse(mailing):
+        recorded = 0
+
+        for batch in chunked(
+                Subscriber.objects.iter_active_undelivered(mailing),
+                subscription_settings.MAILING_BATCH_SIZE):
+            mailing.record_delivered(batch)
+            recorded += len(batch)
+
+        return recorded
+
+    def handle(self, *args, **options):
+        self.stdout.write('{:>12} {:>12} {:>14} {:>10}'.format(
+            'subscribers', 'recorded', 'peak, KiB', 'seconds'))
+
+        for size in options['sizes']:
+            with transaction.atomic():
+                self.create_subscribers(size)
+                mailing = Mailing.objects.create()
+
+                tracemalloc.start()
+                started_at = time.monotonic()
+
+                recorded = self.traverse(mailing)
+
+                seconds = time.monotonic() - started_at
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                transaction.set_rollback(True)
+
+            self.stdout.write('{:>12} {:>12} {:>14.0f} {:>10.1f}'.format(
+                size, recorded, peak / 1024, seconds))
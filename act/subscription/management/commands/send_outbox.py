@@ -0,0 +1,38 @@
+# act_project/act/subscription/management/commands/send_outbox.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from act.services.mail_outbox import MailOutbox
+
+
+class Command(BaseCommand):
+    help = 'Delivers queued e-mails, retrying failed ones with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            dest='loop',
+            default=False,
+            help='Keep polling outbox instead of exiting once it is empty')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            dest='interval',
+            default=5,
+            help='Outbox polling interval in seconds for --loop')
+
+    def handle(self, *args, **options):
+        outbox = MailOutbox()
+
+        while True:
+            sent = outbox.process()
+
+            if options['verbosity'] > 1:
+                self.stdout.write('Sent %d e-mail(s)' % sent)
+
+            if not options['loop']:
+                return
+
+            time.sleep(options['interval'])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('object_id', models.PositiveIntegerField()),
+                ('body_method', models.CharField(max_length=100)),
+                ('subject', models.CharField(max_length=255, verbose_name='Тема')),
+                ('email_from', models.CharField(max_length=300, verbose_name='Відправник')),
+                ('email_to', models.EmailField(max_length=254, verbose_name='Отримувач')),
+                ('status', models.CharField(choices=[('pending', 'В черзі'), ('sending', 'Надсилається'), ('sent', 'Надіслано'), ('failed', 'Помилка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Спроби')),
+                ('last_error', models.TextField(blank=True, verbose_name='Остання помилка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата та час створення')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Дата та час надсилання')),
+            ],
+            options={
+                'verbose_name': 'Лист',
+                'verbose_name_plural': 'Листи',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='outgoingemail',
+            index_together=set([('status', 'next_attempt_at')]),
+        ),
+    ]
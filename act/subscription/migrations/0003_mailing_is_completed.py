@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def complete_existing_mailings(apps, schema_editor):
+    ''' Mailings were recorded only after all e-mails were sent '''
+    Mailing = apps.get_model('subscription', 'Mailing')
+    Mailing.objects.update(is_completed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0002_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mailing',
+            name='is_completed',
+            field=models.BooleanField(default=False, verbose_name='Завершена'),
+        ),
+        migrations.RunPython(
+            complete_existing_mailings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscription', '0003_mailing_is_completed'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscriber',
+            name='is_active',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Активний'),
+        ),
+    ]
@@ -1,25 +1,57 @@
 # act_project/act/subscription/models.py
-from datetime import datetime
+from datetime import datetime, timedelta
+from urllib.parse import urljoin
 
+from django.apps import apps
+from django.core.urlresolvers import reverse
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db import models
 from django.template.loader import render_to_string
 
+from act.utils import get_default_URL
+
 from .services import CheckoutHash
 
 
 class SubscriberManager(models.Manager):
+    CHUNK_SIZE = 1000
+
     def filter_active(self):
         return super(SubscriberManager, self).get_queryset().filter(
             is_active=True)
 
+    def iter_active_undelivered(self, mailing, chunk_size=None):
+        '''
+        Streams active subscribers `mailing` was not delivered to, fetching
+        chunks by primary key ranges, so that memory does not depend on
+        number of subscribers. Only fields required for e-mail are loaded
+        '''
+        chunk_size = chunk_size or self.CHUNK_SIZE
+
+        queryset = (
+            self.filter_active()
+            .exclude(mailings=mailing)
+            .only('id', 'email', 'checkout_hash')
+            .order_by('id'))
+
+        last_id = 0
+        while True:
+            chunk = list(queryset.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                return
+
+            yield from chunk
+
+            last_id = chunk[-1].id
+
 
 class Subscriber(models.Model):
     CheckoutHash = CheckoutHash()
 
     email = models.EmailField('E-mail', max_length=254)
-    is_active = models.BooleanField('Активний', default=False)
+    is_active = models.BooleanField(
+        'Активний', default=False, db_index=True)
     subscribed_at = models.DateTimeField(
         'Дата та час підписки', auto_now_add=True)
     checkout_at = models.DateTimeField(
@@ -79,35 +111,71 @@ class Subscriber(models.Model):
         return render_to_string(template, context)
     subscribe_email.subject = 'Підписка на новини мережі ДІЙ!'
 
-    def subscription_email(self, events):
+    def get_unsubscribe_link(self):
+        return urljoin(get_default_URL(), reverse(
+            'subscribers_detail_unsubscribe_client',
+            args=[self.id, self.checkout_hash]))
+
+    @staticmethod
+    def render_subscription_email(events, unsubscribe_link):
+        '''
+        Digest does not depend on subscriber apart from unsubscribe link,
+        so it could be rendered once with a token in place of the link
+        '''
         template = 'subscription/emails/subscription.html'
         context = {
-            'subscriber': self,
             'events': events,
+            'unsubscribe_link': unsubscribe_link,
             'sent_at': datetime.now(),
         }
 
         return render_to_string(template, context)
+
+    def subscription_email(self, events):
+        return self.render_subscription_email(
+            events, self.get_unsubscribe_link())
     subscription_email.subject = 'Дайджест новин мережі ДІЙ!'
 
 
 class MailingManager(models.Manager):
     def latest_mailing(self):
+        '''
+        Only completed mailings are taken into account
+        '''
         try:
             result = (
                 super(MailingManager, self).get_queryset()
+                .filter(is_completed=True)
                 .latest('mailing_at'))
         except self.model.DoesNotExist:
             result = None
 
         return result
 
+    def unfinished_mailing(self):
+        '''
+        Mailing that was interrupted and should be resumed
+        '''
+        return (
+            super(MailingManager, self).get_queryset()
+            .filter(is_completed=False)
+            .order_by('-mailing_at')
+            .first())
+
 
 class Mailing(models.Model):
+    '''
+    Subscribers are recorded batch by batch as e-mails are delivered to
+    them (or refused permanently), so interrupted mailing could be resumed
+    for the rest of them. Mailing with recipients refused temporarily is
+    not completed, so that it is resumed for them. If process is killed
+    mid-batch, e-mails of that batch are sent again on resume
+    '''
     subscribers = models.ManyToManyField(
         Subscriber, blank=True, related_name='mailings')
     mailing_at = models.DateTimeField(
         'Дата та час розсилки', auto_now_add=True)
+    is_completed = models.BooleanField('Завершена', default=False)
 
     objects = MailingManager()
 
@@ -126,3 +194,120 @@ class Mailing(models.Model):
     def get_subscribers_count(self):
         return self.subscribers.count()
     get_subscribers_count.short_description = 'Кількість підписників'
+
+    def record_delivered(self, subscribers, batch_size=1000):
+        '''
+        Through rows are inserted directly, as subscribers are known to be
+        recorded only once
+        '''
+        Through = self.subscribers.through
+
+        Through.objects.bulk_create(
+            [Through(mailing_id=self.id, subscriber_id=subscriber.id)
+             for subscriber in subscribers],
+            batch_size=batch_size)
+
+    def complete(self):
+        self.is_completed = True
+        self.save(update_fields=['is_completed'])
+
+
+class OutgoingEmailManager(models.Manager):
+    def filter_due(self):
+        '''
+        Pending e-mails whose delivery time has come and e-mails that got
+        stuck in sending (e.g. worker was killed) for longer than
+        `SENDING_TIMEOUT`
+        '''
+        now = timezone.now()
+        stuck_at = now - timedelta(seconds=self.model.SENDING_TIMEOUT)
+
+        return (
+            super(OutgoingEmailManager, self).get_queryset()
+            .filter(
+                models.Q(
+                    status=self.model.STATUS_PENDING,
+                    next_attempt_at__lte=now) |
+                models.Q(
+                    status=self.model.STATUS_SENDING,
+                    started_at__lt=stuck_at))
+            .order_by('next_attempt_at', 'id'))
+
+
+class OutgoingEmail(models.Model):
+    '''
+    Outbox of e-mails delivered in background by `send_outbox` command.
+    Body is rendered on delivery by calling `body_method` of the object
+    identified by model `label` and `object_id`
+    '''
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    STATUSES = (
+        (STATUS_PENDING, 'В черзі'),
+        (STATUS_SENDING, 'Надсилається'),
+        (STATUS_SENT, 'Надіслано'),
+        (STATUS_FAILED, 'Помилка'),
+    )
+
+    SENDING_TIMEOUT = 60 * 10
+
+    label = models.CharField(max_length=100)
+    object_id = models.PositiveIntegerField()
+    body_method = models.CharField(max_length=100)
+    subject = models.CharField('Тема', max_length=255)
+    email_from = models.CharField('Відправник', max_length=300)
+    email_to = models.EmailField('Отримувач', max_length=254)
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField('Спроби', default=0)
+    last_error = models.TextField('Остання помилка', blank=True)
+    created_at = models.DateTimeField(
+        'Дата та час створення', auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(
+        'Дата та час надсилання', null=True, blank=True)
+
+    objects = OutgoingEmailManager()
+
+    class Meta:
+        verbose_name = 'Лист'
+        verbose_name_plural = 'Листи'
+
+        index_together = (('status', 'next_attempt_at'), )
+
+    def __str__(self):
+        return str(self.subject) or self.__class__.__name__
+
+    def get_object(self):
+        return apps.get_model(self.label)._default_manager.get(
+            pk=self.object_id)
+
+    def render_body(self):
+        return getattr(self.get_object(), self.body_method)()
+
+    def mark_sent(self):
+        self.status = self.STATUS_SENT
+        self.sent_at = timezone.now()
+        self.save(update_fields=['status', 'sent_at'])
+
+    def mark_failed(self, error, max_attempts, retry_delay):
+        '''
+        E-mail returns to outbox with exponentially growing delay until it
+        runs out of attempts
+        '''
+        self.attempts += 1
+        self.last_error = error
+
+        if self.attempts >= max_attempts:
+            self.status = self.STATUS_FAILED
+        else:
+            self.status = self.STATUS_PENDING
+            self.next_attempt_at = timezone.now() + timedelta(
+                seconds=retry_delay * 2 ** (self.attempts - 1))
+
+        self.save(update_fields=[
+            'status', 'attempts', 'last_error', 'next_attempt_at'])
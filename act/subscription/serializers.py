@@ -5,6 +5,8 @@ from rest_framework import serializers
 from act.services.mailer import MailerMixin
 
 from .models import Subscriber
+from .services import SplicedBody
+from .settings import settings as subscription_settings
 
 
 class SubscriberSerializer(MailerMixin, serializers.ModelSerializer):
@@ -25,16 +27,32 @@ class SubscriberSerializer(MailerMixin, serializers.ModelSerializer):
         if not subscriber.id:
             raise Subscriber.DoesNotExist('Subscriber is not yet created')
 
-        subscribe_subject = subscriber.subscribe_email.subject
-        subscribe_body = subscriber.subscribe_email()
-
-        super(SubscriberSerializer, self).send_email(
-            subscribe_subject, subscribe_body, None, subscriber.email)
+        super(SubscriberSerializer, self).queue_email(
+            subscriber.subscribe_email.subject, subscriber, 'subscribe_email',
+            None, subscriber.email)
 
     def send_subscription_emails(self, subscribers, events):
-        super(SubscriberSerializer, self).send_mass_email(
+        for _ in self.iter_subscription_emails(subscribers, events):
+            pass
+
+    def iter_subscription_emails(self, subscribers, events):
+        '''
+        Digest is rendered once, only unsubscribe link is spliced in for
+        every subscriber. Yields lists of subscribers digest was delivered
+        to, batch by batch
+        '''
+        digest = SplicedBody(
+            lambda unsubscribe_link: Subscriber.render_subscription_email(
+                events, unsubscribe_link),
+            ('unsubscribe_link', ))
+
+        return super(SubscriberSerializer, self).iter_send_mass_email(
             subscribers,
             lambda subscriber: subscriber.subscription_email.subject,
-            lambda subscriber: subscriber.subscription_email(events),
+            lambda subscriber: digest.render(
+                unsubscribe_link=subscriber.get_unsubscribe_link()),
             lambda subscriber: subscriber.email,
-            None)
+            None,
+            subscription_settings.MAILING_BATCH_SIZE,
+            subscription_settings.MAILING_RATE_LIMIT,
+            subscription_settings.MAILING_CONNECTIONS)
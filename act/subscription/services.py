@@ -1,8 +1,11 @@
 # act_project/act/subscription/services.py
+import re
 import uuid
 import hmac
 import hashlib
 
+from django.utils.html import conditional_escape
+
 
 class CheckoutHash():
     HASH_ALGORITHM = hashlib.sha1
@@ -15,3 +18,34 @@ class CheckoutHash():
 
     def compare(self, x, y):
         return hmac.compare_digest(x, y)
+
+
+class SplicedBody():
+    '''
+    Two-phase rendering of e-mail body shared by many recipients: body is
+    rendered once by `render` callable with tokens in place of recipient
+    specific values (passed as keyword arguments named by `token_names`),
+    and these values are spliced in for every recipient
+    '''
+    def __init__(self, render, token_names):
+        salt = uuid.uuid4().hex
+
+        self.tokens = {
+            'splicedtoken%s%s' % (name.replace('_', ''), salt): name
+            for name in token_names}
+
+        body = render(**{name: token for token, name in self.tokens.items()})
+
+        self.parts = re.split(
+            '(%s)' % '|'.join(re.escape(token) for token in self.tokens),
+            body)
+
+    def render(self, **values):
+        '''
+        Values are escaped the same way template would escape them
+        '''
+        escaped = {
+            token: conditional_escape(values[name])
+            for token, name in self.tokens.items()}
+
+        return ''.join(escaped.get(part, part) for part in self.parts)
@@ -0,0 +1,34 @@
+# act_project/act/subscription/settings.py
+from django.conf import settings as django_settings
+
+
+class Settings(object):
+    DEFAULTS = {
+        'MAILING_BATCH_SIZE': 100,
+        'MAILING_RATE_LIMIT': None,
+        'MAILING_CONNECTIONS': 1,
+    }
+
+    @property
+    def MAILING_BATCH_SIZE(self):
+        return getattr(
+            django_settings,
+            'MAILING_BATCH_SIZE',
+            self.DEFAULTS['MAILING_BATCH_SIZE'])
+
+    @property
+    def MAILING_RATE_LIMIT(self):
+        return getattr(
+            django_settings,
+            'MAILING_RATE_LIMIT',
+            self.DEFAULTS['MAILING_RATE_LIMIT'])
+
+    @property
+    def MAILING_CONNECTIONS(self):
+        return getattr(
+            django_settings,
+            'MAILING_CONNECTIONS',
+            self.DEFAULTS['MAILING_CONNECTIONS'])
+
+
+settings = Settings()
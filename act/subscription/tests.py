@@ -1 +1,69 @@
 # act_project/act/subscription/tests.py
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.template import Context, Engine
+from django.test import SimpleTestCase, override_settings
+
+
+def compile_mjml(source):
+    ''' Stand-in of MJML command line, which returns undecoded output '''
+    return ('<html><body>%s</body></html>' % source).encode('utf-8')
+
+
+class MJMLLoaderTest(SimpleTestCase):
+    template = (
+        '{% load mjml %}'
+        '{% mjml %}'
+        '<mjml><mj-body><mj-container>'
+        '{% if events %}'
+        '<mj-text>{{ greeting }}</mj-text>'
+        '{% endif %}'
+        '</mj-container></mj-body></mjml>'
+        '{% endmjml %}')
+
+    def setUp(self):
+        self.templates_dir = tempfile.mkdtemp()
+        self.cache_dir = tempfile.mkdtemp()
+
+        with open(os.path.join(self.templates_dir, 'email.html'), 'w') as f:
+            f.write(self.template)
+
+    def tearDown(self):
+        shutil.rmtree(self.templates_dir)
+        shutil.rmtree(self.cache_dir)
+
+    def get_engine(self):
+        ''' Engine with loaders configured for the project '''
+        return Engine(
+            dirs=[self.templates_dir],
+            loaders=settings.TEMPLATES[0]['OPTIONS']['loaders'],
+            libraries={'mjml': 'mjml.templatetags.mjml'})
+
+    def render(self):
+        with override_settings(MJML_CACHE_DIR=self.cache_dir):
+            template = self.get_engine().get_template('email.html')
+
+        return template.render(Context({
+            'events': True, 'greeting': 'Hello & welcome'}))
+
+    @mock.patch('mjml.templatetags.mjml.mjml_render')
+    @mock.patch('act.template_loaders.mjml_render', side_effect=compile_mjml)
+    def test_block_is_compiled_once_when_loaded(
+            self, compile_render, runtime_render):
+        html = self.render()
+
+        self.assertFalse(runtime_render.called)
+        self.assertEqual(compile_render.call_count, 1)
+
+        self.assertIn('<mj-text>Hello &amp; welcome</mj-text>', html)
+        self.assertNotIn('mjmltoken', html)
+
+        ''' Another process compiles nothing, block is cached on disk '''
+        self.render()
+
+        self.assertFalse(runtime_render.called)
+        self.assertEqual(compile_render.call_count, 1)
@@ -20,7 +20,8 @@ class SubscriberList(CreateModelMixin, GenericAPIView):
 
     def perform_create(self, serializer):
         '''
-        Send a subscription confirmation e-mail on succesfull serializer save
+        Queue a subscription confirmation e-mail on succesfull serializer
+        save, it is delivered by `send_outbox` command after commit
         '''
         with transaction.atomic():
             subscriber = serializer.save()
@@ -1,7 +1,23 @@
 # act_project/act/website/apps.py
 from django.apps import AppConfig
+from django.core.signals import request_finished
 
 
 class WebsiteConfig(AppConfig):
     name = 'website'
     verbose_name = 'Вебсайт'
+
+    def ready(self):
+        from act.services.content_version import track_content_versions
+
+        track_content_versions(self)
+
+        from .signals import connect_centre_documents_signals
+
+        connect_centre_documents_signals()
+
+        from act.services.scraping_ingestion import flush_on_request_finished
+
+        request_finished.connect(
+            flush_on_request_finished,
+            dispatch_uid='scraping_ingestion_flush')
@@ -0,0 +1,27 @@
+# act/website/management/commands/build_centre_documents.py
+from django.core.management.base import BaseCommand
+
+from ...services import CentreDocumentBuilder
+
+
+class Command(BaseCommand):
+    help = 'Builds stale or missing materialized Centre detail documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            dest='all',
+            default=False,
+            help='Rebuild all of the documents regardless of their state')
+
+    def handle(self, *args, **options):
+        builder = CentreDocumentBuilder()
+
+        if options['all']:
+            built = builder.build_all()
+        else:
+            built = builder.build_stale()
+
+        if options['verbosity'] > 1:
+            self.stdout.write('Built %d centre document(s)' % built)
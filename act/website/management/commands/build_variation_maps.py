@@ -0,0 +1,43 @@
+# act/website/management/commands/build_variation_maps.py
+from django.core.management.base import BaseCommand
+
+from act.services.image_variations import get_image_fields
+
+
+class Command(BaseCommand):
+    help = (
+        'Builds missing or stale variation maps of existing uploads, e.g. '
+        'of rows saved before maps were introduced. Params variations were '
+        'rendered with are unknown to such maps, so '
+        '`rebuild_image_variations` treats them as stale')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'app_labels',
+            nargs='*',
+            help='Applications to take image fields from, all by default')
+
+    def handle(self, *args, **options):
+        built = 0
+
+        for field in get_image_fields(options['app_labels']):
+            if not getattr(field, 'variations_field', None):
+                continue
+
+            instances = (
+                field.model._default_manager
+                .exclude(**{field.name: ''})
+                .order_by('pk'))
+
+            for instance in instances.iterator():
+                if field.get_variation_map(instance) is not None:
+                    continue
+
+                # Saved one by one to notify content version tracking
+                field.update_variation_map(instance)
+                instance.save(update_fields=[field.variations_field])
+
+                built += 1
+
+        if options['verbosity'] > 1:
+            self.stdout.write('Built %d variation map(s)' % built)
@@ -0,0 +1,65 @@
+# act/website/management/commands/crawler_detection_benchmark.py
+import timeit
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from act.services.crawler_detectors import CrawlerDetector
+
+from ...middleware.social_crawlers_middleware import SocialCrawlersMiddleware
+
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) '
+    'AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 '
+    'Safari/604.1',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/120.0.6099.144 Mobile Safari/537.36',
+    'facebookexternalhit/1.1 '
+    '(+http://www.facebook.com/externalhit_uatext.php)',
+    'Twitterbot/1.0',
+    'Mozilla/5.0 (compatible; vkShare; +http://vk.com/dev/Share)',
+    'TelegramBot (like TwitterBot)',
+    'Slackbot-LinkExpanding 1.0 (+https://api.slack.com/robots)',
+    'LinkedInBot/1.0 (compatible; Mozilla/5.0; Apache-HttpClient +'
+    'http://www.linkedin.com)',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares crawler detection of a single compiled registry with '
+        'per-detector substring scan on a sample of user agents')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--number', type=int, default=10000,
+            help='Number of passes over user agents sample')
+
+    def handle(self, *args, **options):
+        requests = [
+            SimpleNamespace(META={CrawlerDetector.HTTP_USER_AGENT: agent})
+            for agent in USER_AGENTS]
+
+        registry = SocialCrawlersMiddleware.crawler_registry
+        detectors = registry.detectors
+
+        def scan():
+            for request in requests:
+                any(
+                    detector.is_user_agent_matching(request)
+                    for detector in detectors)
+
+        def match():
+            for request in requests:
+                registry.is_user_agent_matching(request)
+
+        for name, function in (('Substring scan', scan),
+                               ('Registry', match)):
+            seconds = timeit.timeit(function, number=options['number'])
+            checks = options['number'] * len(requests)
+
+            self.stdout.write('{name}: {rate:.0f} checks per second'.format(
+                name=name, rate=checks / seconds))
@@ -0,0 +1,129 @@
+# act/website/management/commands/document_upload_benchmark.py
+import io
+import os
+import time
+import zipfile
+import tracemalloc
+
+import magic
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from django.forms.models import inlineformset_factory
+
+from ...models import Project, ProjectAttachedDocument
+
+
+def sniff_whole_file(value):
+    '''
+    Frozen copy of content type detection preceding bounded header reads
+    '''
+    content_type = magic.from_buffer(value.read(), mime=True)
+    value.seek(0)
+
+    return content_type
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures time and peak memory of validating a project admin form '
+        'with many attached document inlines, compared with sniffing '
+        'content type of whole uploads')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uploads', type=int, default=20,
+            help='Number of attached document inlines')
+        parser.add_argument(
+            '--size', type=int, default=4 * 1024 * 1024,
+            help='Size of every upload, in bytes')
+
+    @staticmethod
+    def build_pdf(size):
+        return b'%PDF-1.4\n' + os.urandom(size - 9)
+
+    @staticmethod
+    def build_docx(size):
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w', zipfile.ZIP_STORED) as container:
+            container.writestr('[Content_Types].xml', '<xml/>')
+            container.writestr('docProps/thumbnail.jpeg', os.urandom(size))
+            container.writestr('word/document.xml', '<xml/>')
+
+        return content.getvalue()
+
+    def build_uploads(self, number, size):
+        ''' Uploads are written to disk, as upload handlers do for them '''
+        uploads = []
+        for index in range(number):
+            if index % 2:
+                name = 'document%d.docx' % index
+                content = self.build_docx(size)
+            else:
+                name = 'document%d.pdf' % index
+                content = self.build_pdf(size)
+
+            upload = TemporaryUploadedFile(
+                name, 'application/octet-stream', len(content), None)
+            upload.write(content)
+            upload.seek(0)
+
+            uploads.append(upload)
+
+        return uploads
+
+    @staticmethod
+    def measure(validate):
+        tracemalloc.start()
+        started_at = time.perf_counter()
+
+        result = validate()
+
+        seconds = time.perf_counter() - started_at
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return result, seconds, peak
+
+    def validate_formset(self, uploads):
+        FormSet = inlineformset_factory(
+            Project, ProjectAttachedDocument, fields=('document', ),
+            extra=len(uploads))
+
+        prefix = FormSet.get_default_prefix()
+        data = {
+            '%s-TOTAL_FORMS' % prefix: str(len(uploads)),
+            '%s-INITIAL_FORMS' % prefix: '0',
+        }
+        files = {
+            '%s-%d-document' % (prefix, index): upload
+            for index, upload in enumerate(uploads)}
+
+        formset = FormSet(data, files, instance=Project(), prefix=prefix)
+
+        return formset.is_valid()
+
+    def handle(self, *args, **options):
+        uploads = self.build_uploads(options['uploads'], options['size'])
+
+        try:
+            self.stdout.write('Uploads: %d of %d bytes' % (
+                len(uploads), options['size']))
+            self.stdout.write('{:>24} {:>10} {:>14}'.format(
+                '', 'seconds', 'peak, KiB'))
+
+            is_valid, seconds, peak = self.measure(
+                lambda: self.validate_formset(uploads))
+            self.stdout.write('{:>24} {:>10.3f} {:>14.0f}'.format(
+                'inline formset', seconds, peak / 1024))
+
+            if not is_valid:
+                self.stderr.write('Inline formset did not validate')
+
+            _, seconds, peak = self.measure(
+                lambda: [sniff_whole_file(upload) for upload in uploads])
+            self.stdout.write('{:>24} {:>10.3f} {:>14.0f}'.format(
+                'whole file sniffing', seconds, peak / 1024))
+        finally:
+            for upload in uploads:
+                upload.close()
@@ -0,0 +1,26 @@
+# act/website/management/commands/enqueue_image_variations.py
+from django.core.management.base import BaseCommand
+
+from act.services.image_variations import (
+    ImageVariationQueue, get_image_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        'Enqueues existing uploads to render their variations (including '
+        'extra formats and densities) in background')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'app_labels',
+            nargs='*',
+            help='Applications to take image fields from, all by default')
+
+    def handle(self, *args, **options):
+        queue = ImageVariationQueue()
+
+        enqueued = queue.enqueue_existing(
+            get_image_fields(options['app_labels']))
+
+        if options['verbosity'] > 1:
+            self.stdout.write('Enqueued %d image(s)' % enqueued)
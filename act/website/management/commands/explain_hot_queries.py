@@ -0,0 +1,35 @@
+# act/website/management/commands/explain_hot_queries.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from act.services.query_plans import SUPPORTED_VENDORS, explain_hot_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Runs EXPLAIN on hot queries and fails if any of them is resolved '
+        'with a full table scan. The same check runs within tests, the '
+        'command shows plans against production-sized data')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(
+                'Query plans of %s are not supported' % connection.vendor)
+
+        full_scans = []
+
+        for name, table, access, is_full_scan in explain_hot_queries():
+            if is_full_scan:
+                full_scans.append(name)
+
+            self.stdout.write('{mark} {name}: {table} {access}'.format(
+                mark='!' if is_full_scan else ' ',
+                name=name,
+                table=table or '',
+                access=access))
+
+        if full_scans:
+            raise CommandError(
+                'Full table scans: %s' % ', '.join(sorted(set(full_scans))))
+
+        self.stdout.write(self.style.SUCCESS('No full table scans'))
@@ -0,0 +1,98 @@
+# act/website/management/commands/image_serialization_benchmark.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.fields.files import ImageFieldFile
+from django.test import RequestFactory
+
+from rest_framework import serializers
+from rest_framework.request import Request
+
+from act.serializers import StdImageSerializer
+
+from ...models import City
+from ...serializers import CitySerializer
+
+
+def walk_representation(field, value):
+    '''
+    Frozen copy of `StdImageSerializer.to_representation()` preceding
+    variation maps, which walks variation files of every image
+    '''
+    if not value:
+        return None
+
+    images = {
+        key: image for key, image in value.__dict__.items()
+        if isinstance(image, ImageFieldFile)}
+
+    representation = {
+        'original': serializers.ImageField.to_representation(field, value)}
+
+    for key, image in images.items():
+        representation[key] = serializers.ImageField.to_representation(
+            field, image)
+
+    return representation
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares per-row cost of serializing images of cities by walking '
+        'variation files and by looking up stored variation maps')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=100,
+            help='Number of cities serialized')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of runs, the best one is reported')
+
+    def get_rows(self):
+        ''' Fresh instances, so that parsed maps are not memoized '''
+        return list(City.objects.all()[:self.rows])
+
+    def measure(self, represent):
+        timings = []
+        for _ in range(self.repeat):
+            rows = self.get_rows()
+
+            started_at = time.perf_counter()
+            for row in rows:
+                for name, field in self.image_fields:
+                    represent(field, getattr(row, name))
+            timings.append(time.perf_counter() - started_at)
+
+        return min(timings) / len(rows) * 10 ** 6
+
+    def handle(self, *args, **options):
+        self.rows = options['rows']
+        self.repeat = options['repeat']
+
+        rows = self.get_rows()
+        if not rows:
+            raise CommandError('No cities to serialize')
+
+        request = Request(RequestFactory().get('/api/cities'))
+        serializer = CitySerializer(context={'request': request})
+
+        self.image_fields = [
+            (name, field) for name, field in serializer.fields.items()
+            if isinstance(field, StdImageSerializer)]
+
+        mapped = sum(
+            1
+            for row in rows
+            for name, field in self.image_fields
+            if getattr(row, name) and field.get_variation_map(
+                getattr(row, name)) is not None)
+
+        self.stdout.write('Rows: %d, images with variation map: %d' % (
+            len(rows), mapped))
+        self.stdout.write('{:>18} {:>18}'.format(
+            'walk, us/row', 'map, us/row'))
+        self.stdout.write('{:>18.1f} {:>18.1f}'.format(
+            self.measure(walk_representation),
+            self.measure(
+                lambda field, value: field.to_representation(value))))
@@ -0,0 +1,137 @@
+# act/website/management/commands/pagination_benchmark.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+
+from act.utils import chunked
+
+from ...models import Event, Project
+from ...views_api import (
+    EventLimitOffsetPagination, EventPageNumberPagination,
+    EventKeysetPagination, ProjectLimitOffsetPagination,
+    ProjectPageNumberPagination, ProjectKeysetPagination,
+)
+
+PAGINATIONS = {
+    'event': (
+        Event, EventPageNumberPagination, EventLimitOffsetPagination,
+        EventKeysetPagination),
+    'project': (
+        Project, ProjectPageNumberPagination, ProjectLimitOffsetPagination,
+        ProjectKeysetPagination),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares time of fetching pages at increasing depths with page '
+        'number, limit/offset and keyset pagination. Either existing rows '
+        'are paginated, or archives of `--rows` synthetic rows each, which '
+        'are created within a transaction that is rolled back')
+
+    BATCH_SIZE = 1000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(PAGINATIONS), default='event')
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[],
+            help='Sizes of synthetic archives, e.g. 10000 100000 1000000')
+        parser.add_argument(
+            '--depths', type=int, nargs='+',
+            default=[0, 100, 1000, 10000, 100000, 999000],
+            help='Numbers of rows preceding fetched page')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Number of fetches per depth, the best one is reported')
+
+    def measure(self, paginate):
+        timings = []
+        for _ in range(self.repeat):
+            started_at = time.perf_counter()
+            paginate()
+            timings.append(time.perf_counter() - started_at)
+
+        return min(timings) * 1000
+
+    def get_page_number(self, depth):
+        pagination = self.page_number_class()
+        request = Request(self.factory.get('/api/', {
+            'page': depth // pagination.page_size + 1}))
+
+        return lambda: pagination.paginate_queryset(self.queryset, request)
+
+    def get_limit_offset(self, depth):
+        pagination = self.limit_offset_class()
+        request = Request(self.factory.get('/api/', {
+            'limit': self.keyset_class.page_size, 'offset': depth}))
+
+        return lambda: pagination.paginate_queryset(self.queryset, request)
+
+    def get_keyset(self, depth):
+        pagination = self.keyset_class()
+        pagination.base_url = 'http://testserver/api/'
+
+        ''' Cursor of a page is built outside of measurement '''
+        position = None
+        if depth:
+            boundary = self.queryset.order_by(
+                *self.keyset_class.ordering)[depth - 1]
+            position = pagination.get_position_from_instance(boundary)
+
+        request = Request(self.factory.get(pagination.encode_cursor(
+            Cursor(offset=0, reverse=False, position=position))))
+
+        return lambda: pagination.paginate_queryset(self.queryset, request)
+
+    def create_rows(self, number):
+        rows = (
+            self.model(
+                title_uk='Benchmark %s %d' % (self.model_name, index),
+                slug='benchmark_%d' % index)
+            for index in range(number))
+
+        for chunk in chunked(rows, self.BATCH_SIZE):
+            self.model.objects.bulk_create(chunk)
+
+    def run(self, depths):
+        total = self.queryset.count()
+        depths = [depth for depth in depths if depth < total]
+        if not depths:
+            raise CommandError('Not enough rows (%d) for any depth' % total)
+
+        self.stdout.write('Rows: %d' % total)
+        self.stdout.write('{:>10} {:>14} {:>14} {:>14}'.format(
+            'depth', 'page, ms', 'offset, ms', 'keyset, ms'))
+
+        for depth in depths:
+            self.stdout.write('{:>10} {:>14.2f} {:>14.2f} {:>14.2f}'.format(
+                depth,
+                self.measure(self.get_page_number(depth)),
+                self.measure(self.get_limit_offset(depth)),
+                self.measure(self.get_keyset(depth))))
+
+    def handle(self, *args, **options):
+        self.model_name = options['model']
+        (self.model, self.page_number_class, self.limit_offset_class,
+            self.keyset_class) = PAGINATIONS[self.model_name]
+
+        self.factory = RequestFactory()
+        self.queryset = self.model.objects.all()
+        self.repeat = options['repeat']
+
+        if not options['rows']:
+            self.run(options['depths'])
+            return
+
+        for number in options['rows']:
+            with transaction.atomic():
+                self.create_rows(number)
+                self.run(options['depths'])
+
+                transaction.set_rollback(True)
@@ -0,0 +1,75 @@
+# act/website/management/commands/rebuild_image_variations.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from act.services.image_variations import (
+    ImageVariationRebuilder, get_image_fields)
+
+
+class Command(BaseCommand):
+    help = (
+        'Regenerates missing or stale variations of stored images with a '
+        'pool of processes, resuming from checkpoint if one exists')
+
+    APP_LABELS = ('website', 'metadata', )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=None,
+            help='Number of worker processes')
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            dest='force',
+            default=False,
+            help='Regenerate variations even if they are up to date')
+        parser.add_argument(
+            '--checkpoint',
+            dest='checkpoint',
+            default=os.path.join(
+                settings.BASE_DIR, 'rebuild_image_variations.checkpoint'),
+            help='Path of checkpoint file to resume from')
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            dest='restart',
+            default=False,
+            help='Discard checkpoint and start from the beginning')
+
+    def handle(self, *args, **options):
+        rebuilder = ImageVariationRebuilder(
+            options['checkpoint'],
+            workers=options['workers'],
+            force=options['force'],
+            report=self.report)
+
+        if options['restart']:
+            rebuilder.clear_checkpoint()
+
+        stats, errors = rebuilder.rebuild(get_image_fields(self.APP_LABELS))
+
+        for file_name, error in errors:
+            self.stderr.write('%s: %s' % (file_name, error))
+
+        self.report(stats)
+
+    def report(self, stats):
+        processed = sum(
+            stats[status] for status in (
+                ImageVariationRebuilder.STATUS_RENDERED,
+                ImageVariationRebuilder.STATUS_SKIPPED,
+                ImageVariationRebuilder.STATUS_FAILED))
+
+        self.stdout.write(
+            '%d/%d image(s): %d rendered, %d skipped, %d failed, '
+            '%.1f images/sec' % (
+                processed, stats['total'],
+                stats[ImageVariationRebuilder.STATUS_RENDERED],
+                stats[ImageVariationRebuilder.STATUS_SKIPPED],
+                stats[ImageVariationRebuilder.STATUS_FAILED],
+                stats['images_per_second']))
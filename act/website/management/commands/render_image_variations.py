@@ -0,0 +1,31 @@
+# act/website/management/commands/render_image_variations.py
+from django.core.management.base import BaseCommand
+
+from act.services.image_variations import ImageVariationQueue
+
+
+class Command(BaseCommand):
+    help = 'Renders queued image variations with a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=None,
+            help='Number of worker processes')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=None,
+            help='Number of jobs claimed at once')
+
+    def handle(self, *args, **options):
+        queue = ImageVariationQueue(
+            workers=options['workers'], batch_size=options['batch_size'])
+
+        processed = queue.process()
+
+        if options['verbosity'] > 1:
+            self.stdout.write('Processed %d image variation job(s)' % processed)
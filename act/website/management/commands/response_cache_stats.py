@@ -0,0 +1,20 @@
+# act/website/management/commands/response_cache_stats.py
+from django.core.management.base import BaseCommand
+
+from act.services.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Shows response cache hit and miss counters. Workers share their '
+        'counts once per `RESPONSE_CACHE_STATS_INTERVAL` seconds')
+
+    def handle(self, *args, **options):
+        stats = response_cache.stats()
+
+        requests = stats['hits'] + stats['misses']
+        hit_rate = (stats['hits'] / requests * 100) if requests else 0
+
+        self.stdout.write(
+            'Hits: {hits}, misses: {misses}, hit rate: {rate:.1f}%'.format(
+                rate=hit_rate, **stats))
@@ -1,35 +1,94 @@
 # act/website/middleware/social_crawlers_middleware.py
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.template.loader import render_to_string
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 
 from act.services.crawler_detectors import (
     FacebookCrawlerDetector, VkontakteCrawlerDetector, TwitterCrawlerDetector,
+    CrawlerRegistry,
 )
+from act.services.head_cache import HeadCache
+
+from metadata.heads import head_renderer
 
 from ..models import Scraping
 
 
 class SocialCrawlersMiddleware(object):
-    crawler_detectors = (
+    '''
+    Serves crawlers a document of object `<head>` rendered on the server
+    side, or of scraped `<head>` for paths that do not belong to any object,
+    instead of the client side rendered page. Crawlers are answered before
+    the view is called, documents come from in-process cache. Documents of
+    objects depend on content versions of models their head is rendered
+    from, scraped documents depend on scraping version only
+    '''
+    crawler_registry = CrawlerRegistry((
         FacebookCrawlerDetector,
         VkontakteCrawlerDetector,
         TwitterCrawlerDetector,
-    )
+    ))
+
+    ''' Paths that never serve client side rendered pages '''
+    skipped_path_prefixes = ('/api/', '/deus_ex_machina/', )
+
+    head_cache = HeadCache()
+
+    def process_request(self, request):
+        if self.is_skipped(request) or not self.is_crawler(request):
+            return None
 
-    def process_response(self, request, response):
-        if self.is_crawler(request):
-            scraped = get_object_or_404(Scraping, path=request.path)
+        path = request.path
 
-            response.content = render_to_string(
-                'website/middleware/social_crawlers.html',
-                {'head': format_html(scraped.head)})
+        document = self.head_cache.get_or_set(
+            Scraping.get_path_hash(path),
+            self.get_document_models(path),
+            lambda: self.render_document(path))
 
-        return response
+        if document is None:
+            raise Http404('Scraping does not exist')
+
+        return HttpResponse(document)
+
+    def is_skipped(self, request):
+        return request.path.startswith(
+            self.skipped_path_prefixes + (
+                settings.STATIC_URL, settings.MEDIA_URL))
 
     def is_crawler(self, request):
-        for crawler_detector in self.crawler_detectors:
-            if crawler_detector.is_user_agent_matching(request):
-                return True
+        return bool(self.crawler_registry.is_user_agent_matching(request))
+
+    @staticmethod
+    def get_document_models(path):
+        resolved = head_renderer.resolve(path)
+        if resolved is None:
+            return (Scraping, )
+
+        return head_renderer.get_models(resolved[1])
+
+    @staticmethod
+    def get_scraped_head(path):
+        head = (
+            Scraping.objects
+            .filter(path_hash=Scraping.get_path_hash(path))
+            .values_list('head', flat=True)
+            .first())
+
+        return format_html(head) if head is not None else None
+
+    @classmethod
+    def render_document(cls, path):
+        head = head_renderer.get_head(path)
+
+        if head is not None:
+            head = mark_safe(head)
+        else:
+            head = cls.get_scraped_head(path)
+
+        if head is None:
+            return None
 
-        return False
+        return render_to_string(
+            'website/middleware/social_crawlers.html', {'head': head})
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='event',
+            index_together=set([('created_at', 'id')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='project',
+            index_together=set([('modified_at', 'id')]),
+        ),
+    ]
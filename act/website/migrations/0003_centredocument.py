@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0002_ordering_index_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CentreDocument',
+            fields=[
+                ('centre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='website.Centre')),
+                ('document', models.TextField(blank=True)),
+                ('is_stale', models.BooleanField(default=True)),
+                ('revision', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'website_centres_documents',
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+from metadata.utils import truncate_text
+
+EXCERPT_LENGTH = 280
+
+
+def fill_excerpts(apps, schema_editor):
+    for model_name in ('Project', 'Event'):
+        Model = apps.get_model('website', model_name)
+
+        for instance in Model.objects.all():
+            for language, _ in settings.TRANSMETA_LANGUAGES:
+                content = getattr(instance, 'content_%s' % language)
+                setattr(
+                    instance,
+                    'excerpt_%s' % language,
+                    truncate_text(content or '', EXCERPT_LENGTH))
+
+            instance.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0003_centredocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='excerpt_uk',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Короткий зміст'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='excerpt_uk',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Короткий зміст'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
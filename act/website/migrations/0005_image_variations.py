@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import act.services.file_name
+from django.db import migrations, models
+import website.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0004_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='city',
+            name='photo_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації фотографії (головної)'),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='photo_high_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації фотографії (високої)'),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='photo_square_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації фотографії (квадратної)'),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='image_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації зображення'),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='photo_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації фотографії'),
+        ),
+        migrations.AddField(
+            model_name='partner',
+            name='logo_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації логотипу'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='image_variations',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варіації зображення'),
+        ),
+        migrations.AlterField(
+            model_name='city',
+            name='photo',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('cities/photos/'), variations_field='photo_variations', verbose_name='Фотографія (головна)'),
+        ),
+        migrations.AlterField(
+            model_name='city',
+            name='photo_high',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('cities/photos/'), variations_field='photo_high_variations', verbose_name='Фотографія (висока)'),
+        ),
+        migrations.AlterField(
+            model_name='city',
+            name='photo_square',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('cities/photos/'), variations_field='photo_square_variations', verbose_name='Фотографія (квадратна)'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='image',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('events/images/'), variations_field='image_variations', verbose_name='Головне зображення'),
+        ),
+        migrations.AlterField(
+            model_name='participant',
+            name='photo',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('participants/photos/'), variations_field='photo_variations', verbose_name='Фотографія'),
+        ),
+        migrations.AlterField(
+            model_name='partner',
+            name='logo',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('partners/logos/'), variations_field='logo_variations', verbose_name='Логотип'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='image',
+            field=website.models.FixedStdImageField(upload_to=act.services.file_name.RandomFileName('projects/images/'), variations_field='image_variations', verbose_name='Головне зображення'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_image_variations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('label', models.CharField(max_length=100)),
+                ('field_name', models.CharField(max_length=100)),
+                ('file_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'В черзі'), ('processing', 'Обробляється'), ('done', 'Виконано'), ('failed', 'Помилка')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'website_images_variations_jobs',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='imagevariationjob',
+            index_together=set([('status', 'created_at')]),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+SCRAPING_PATH_INDEX = 'website_scrapings_path_prefix'
+SCRAPING_PATH_PREFIX = 191
+
+
+def add_scraping_path_index(apps, schema_editor):
+    ''' MySQL can not index whole `path`, so only its prefix is indexed '''
+    Scraping = apps.get_model('website', 'Scraping')
+    quote_name = schema_editor.quote_name
+
+    column = quote_name('path')
+    if schema_editor.connection.vendor == 'mysql':
+        column = '%s(%d)' % (column, SCRAPING_PATH_PREFIX)
+
+    schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+        quote_name(SCRAPING_PATH_INDEX),
+        quote_name(Scraping._meta.db_table),
+        column))
+
+
+def remove_scraping_path_index(apps, schema_editor):
+    Scraping = apps.get_model('website', 'Scraping')
+    quote_name = schema_editor.quote_name
+
+    if schema_editor.connection.vendor == 'mysql':
+        sql = 'DROP INDEX %s ON %s' % (
+            quote_name(SCRAPING_PATH_INDEX),
+            quote_name(Scraping._meta.db_table))
+    else:
+        sql = 'DROP INDEX %s' % quote_name(SCRAPING_PATH_INDEX)
+
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_imagevariationjob'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='event',
+            index_together=set([('created_at', 'id'), ('is_active', 'created_at', 'id')]),
+        ),
+        migrations.RunPython(
+            add_scraping_path_index, remove_scraping_path_index),
+    ]
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+
+SCRAPING_PATH_INDEX = 'website_scrapings_path_prefix'
+
+
+def get_path_hash(path):
+    ''' Frozen copy of `Scraping.get_path_hash()` '''
+    path = '/' + urlsplit(path.strip()).path.strip('/')
+    return hashlib.sha1(path.encode('utf-8')).hexdigest()
+
+
+def fill_path_hashes(apps, schema_editor):
+    '''
+    Hashes paths, keeping the latest of duplicate rows
+    '''
+    Scraping = apps.get_model('website', 'Scraping')
+
+    hashed = set()
+    for scraping in Scraping.objects.order_by('-id').iterator():
+        path_hash = get_path_hash(scraping.path)
+
+        if path_hash in hashed:
+            scraping.delete()
+            continue
+
+        hashed.add(path_hash)
+        Scraping.objects.filter(id=scraping.id).update(path_hash=path_hash)
+
+
+def drop_scraping_path_index(apps, schema_editor):
+    ''' Path prefix index of `0007` is superseded by unique hash '''
+    Scraping = apps.get_model('website', 'Scraping')
+    quote_name = schema_editor.quote_name
+
+    if schema_editor.connection.vendor == 'mysql':
+        sql = 'DROP INDEX %s ON %s' % (
+            quote_name(SCRAPING_PATH_INDEX),
+            quote_name(Scraping._meta.db_table))
+    else:
+        sql = 'DROP INDEX %s' % quote_name(SCRAPING_PATH_INDEX)
+
+    schema_editor.execute(sql)
+
+
+def create_scraping_path_index(apps, schema_editor):
+    Scraping = apps.get_model('website', 'Scraping')
+    quote_name = schema_editor.quote_name
+
+    column = quote_name('path')
+    if schema_editor.connection.vendor == 'mysql':
+        column = '%s(191)' % column
+
+    schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+        quote_name(SCRAPING_PATH_INDEX),
+        quote_name(Scraping._meta.db_table),
+        column))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraping',
+            name='path_hash',
+            field=models.CharField(editable=False, max_length=40, null=True),
+        ),
+        migrations.RunPython(fill_path_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='scraping',
+            name='path_hash',
+            field=models.CharField(editable=False, max_length=40, unique=True),
+        ),
+        migrations.RunPython(
+            drop_scraping_path_index, create_scraping_path_index),
+    ]
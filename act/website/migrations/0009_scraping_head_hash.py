@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def fill_head_hashes(apps, schema_editor):
+    Scraping = apps.get_model('website', 'Scraping')
+
+    for scraping in Scraping.objects.only('id', 'head').iterator():
+        Scraping.objects.filter(id=scraping.id).update(
+            head_hash=hashlib.sha1(scraping.head.encode('utf-8')).hexdigest())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_scraping_path_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraping',
+            name='head_hash',
+            field=models.CharField(default='', editable=False, max_length=40),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_head_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations
+
+from metadata.utils import truncate_text
+
+EXCERPT_LENGTH = 280
+
+
+def refill_excerpts(apps, schema_editor):
+    '''
+    Excerpts filled before contained HTML entities of RichText content
+    '''
+    for model_name in ('Project', 'Event'):
+        Model = apps.get_model('website', model_name)
+
+        for instance in Model.objects.iterator():
+            Model.objects.filter(id=instance.id).update(**{
+                'excerpt_%s' % language: truncate_text(
+                    getattr(instance, 'content_%s' % language) or '',
+                    EXCERPT_LENGTH)
+                for language, _ in settings.TRANSMETA_LANGUAGES})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0009_scraping_head_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(refill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_excerpt_plain_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagevariationjob',
+            name='next_attempt_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterIndexTogether(
+            name='imagevariationjob',
+            index_together=set([('status', 'next_attempt_at')]),
+        ),
+    ]
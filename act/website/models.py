@@ -1,10 +1,14 @@
 # act_project/act/website/models.py
 import os
-from datetime import datetime
+import json
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
 
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
-from django.db import models
+from django.conf import settings
+from django.db import connection, models, transaction, IntegrityError
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
@@ -13,18 +17,21 @@ from django.utils.text import slugify
 from django.template.defaultfilters import filesizeformat, truncatechars
 from django.template.loader import render_to_string
 
+from rest_framework.utils.encoders import JSONEncoder
 from transliterate import translit
 from ckeditor.fields import RichTextField
-from stdimage.models import StdImageField
 
+from act.fields import VariationMapStdImageField
 from act.validators import FileContentTypeValidator
 from act.utils import get_default_URL
 # Notice overridden transmeta import!
-from act.services.transmeta import TransMeta
+from act.services.transmeta import TransMeta, get_real_fieldname
 from act.services.file_name import RandomFileName
+from act.services.content_version import content_version
 
 from metadata.mixins import MetadataMixin
 from metadata.models import update_with_metadata_variations
+from metadata.utils import truncate_text
 
 from .validators import (
     top_event_validator,
@@ -46,7 +53,7 @@ def get_table_name(*args):
     return '_'.join((app_label, ) + args)
 
 
-class FixedStdImageField(StdImageField):
+class FixedStdImageField(VariationMapStdImageField):
     '''
     Specified default width and height for a StdImageField that
     could be later used in consuming model attributes definition
@@ -54,6 +61,27 @@ class FixedStdImageField(StdImageField):
     MAX_WIDTH = 1920
     MAX_HEIGHT = 1280
 
+    ''' Extra formats variations could opt in to be rendered in '''
+    FORMATS = ('WEBP', )
+
+
+class ExcerptMixin():
+    '''
+    Keeps plain text `excerpt` of RichText `content` for every translation,
+    so that lists never need to load and ship HTML body. Model should
+    declare both fields as translatable
+    '''
+    EXCERPT_LENGTH = 280
+
+    def set_excerpt(self):
+        for language, _ in settings.TRANSMETA_LANGUAGES:
+            content = getattr(self, get_real_fieldname('content', language))
+
+            setattr(
+                self,
+                get_real_fieldname('excerpt', language),
+                truncate_text(content or '', self.EXCERPT_LENGTH))
+
 
 # Content
 
@@ -196,13 +224,21 @@ class Partner(models.Model, metaclass=TransMeta):
     LOGO_PATH = 'partners/logos/'
 
     variations = {
-        'square': {'width': 300, 'height': 300, 'crop': True},
+        'square': {
+            'width': 300,
+            'height': 300,
+            'crop': True,
+            'formats': FixedStdImageField.FORMATS,
+            'densities': (2, )},
     }
 
     logo = FixedStdImageField(
         'Логотип',
         upload_to=RandomFileName(LOGO_PATH),
-        variations=variations)
+        variations=variations,
+        variations_field='logo_variations')
+    logo_variations = models.TextField(
+        'Варіації логотипу', blank=True, editable=False)
 
     name = models.CharField('Назва компанії', max_length=250)
     link = models.URLField('Посилання', max_length=200)
@@ -326,9 +362,12 @@ class ProjectArea(models.Model, metaclass=TransMeta):
     get_projects_count.short_description = 'Кількість діяльностей'
 
 
-class Project(MetadataMixin, models.Model, metaclass=TransMeta):
+class Project(
+    ExcerptMixin, MetadataMixin, models.Model, metaclass=TransMeta
+):
     LIMIT = {'default': 3, 'max': 100}
     PAGE_SIZE = {'default': 5, 'max': 100}
+    NESTED_LIMIT = {'events': 12}
 
     STATIC_PATH_FORMAT = 'projects/{id}/{slug}'
 
@@ -338,13 +377,17 @@ class Project(MetadataMixin, models.Model, metaclass=TransMeta):
         'wide': {
             'width': FixedStdImageField.MAX_WIDTH,
             'height': 810,
-            'crop': True},
+            'crop': True,
+            'formats': FixedStdImageField.FORMATS},
     })
 
     image = FixedStdImageField(
         'Головне зображення',
         upload_to=RandomFileName(IMAGE_PATH),
-        variations=variations)
+        variations=variations,
+        variations_field='image_variations')
+    image_variations = models.TextField(
+        'Варіації зображення', blank=True, editable=False)
 
     project_area = models.ForeignKey(
         ProjectArea,
@@ -362,6 +405,9 @@ class Project(MetadataMixin, models.Model, metaclass=TransMeta):
     content = RichTextField(
         'Контент', config_name='article_toolbar',
     )
+    excerpt = models.CharField(
+        'Короткий зміст', max_length=300, blank=True, editable=False,
+    )
     is_active = models.BooleanField(
         'Відображається', blank=True, default=True,
     )
@@ -378,8 +424,10 @@ class Project(MetadataMixin, models.Model, metaclass=TransMeta):
         verbose_name_plural = order_prefix + 'Діяльності'
 
         ordering = ('-modified_at', '-id', )
+        # Supports ordering and keyset pagination
+        index_together = (('modified_at', 'id', ), )
 
-        translate = ('title', 'content', )
+        translate = ('title', 'content', 'excerpt', )
 
     def __str__(self):
         return str(self.title) or self.__class__.__name__
@@ -390,6 +438,8 @@ class Project(MetadataMixin, models.Model, metaclass=TransMeta):
             transliterated = translit(self.title, 'uk', reversed=True)
             self.slug = slugify(transliterated).replace('-', '_')
 
+        self.set_excerpt()
+
         super(Project, self).save(*args, **kwargs)
 
     '''Events shortcut methods'''
@@ -488,7 +538,9 @@ class EventManager(models.Manager):
         )
 
 
-class Event(MetadataMixin, models.Model, metaclass=TransMeta):
+class Event(
+    ExcerptMixin, MetadataMixin, models.Model, metaclass=TransMeta
+):
     LIMIT = {'default': 6, 'max': 100}
     PAGE_SIZE = {'default': 9, 'max': 100}
 
@@ -497,17 +549,26 @@ class Event(MetadataMixin, models.Model, metaclass=TransMeta):
     IMAGE_PATH = 'events/images/'
 
     variations = update_with_metadata_variations({
-        'square': {'width': 480, 'height': 480, 'crop': True},
+        'square': {
+            'width': 480,
+            'height': 480,
+            'crop': True,
+            'formats': FixedStdImageField.FORMATS,
+            'densities': (2, )},
         'wide': {
             'width': FixedStdImageField.MAX_WIDTH,
             'height': 810,
-            'crop': True},
+            'crop': True,
+            'formats': FixedStdImageField.FORMATS},
     })
 
     image = FixedStdImageField(
         'Головне зображення',
         upload_to=RandomFileName(IMAGE_PATH),
-        variations=variations)
+        variations=variations,
+        variations_field='image_variations')
+    image_variations = models.TextField(
+        'Варіації зображення', blank=True, editable=False)
 
     event_category = models.ForeignKey(
         EventCategory,
@@ -531,6 +592,9 @@ class Event(MetadataMixin, models.Model, metaclass=TransMeta):
     content = RichTextField(
         'Контент', config_name='article_toolbar',
     )
+    excerpt = models.CharField(
+        'Короткий зміст', max_length=300, blank=True, editable=False,
+    )
     is_active = models.BooleanField(
         'Відображається', blank=True, default=True,
     )
@@ -548,8 +612,14 @@ class Event(MetadataMixin, models.Model, metaclass=TransMeta):
         verbose_name_plural = order_prefix + 'Матеріали'
 
         ordering = ('-created_at', '-id', )
+        # Supports ordering and keyset pagination, the latter one also
+        # filtering and ordering of active events by `EventManager`
+        index_together = (
+            ('created_at', 'id', ),
+            ('is_active', 'created_at', 'id', ),
+        )
 
-        translate = ('title', 'content', )
+        translate = ('title', 'content', 'excerpt', )
 
     def __str__(self):
         return str(self.title) or self.__class__.__name__
@@ -560,6 +630,8 @@ class Event(MetadataMixin, models.Model, metaclass=TransMeta):
             transliterated = translit(self.title, 'uk', reversed=True)
             self.slug = slugify(transliterated).replace('-', '_')
 
+        self.set_excerpt()
+
         super(Event, self).save(*args, **kwargs)
 
     def get_static_path(self):
@@ -612,14 +684,25 @@ class City(MetadataMixin, models.Model, metaclass=TransMeta):
     photo = FixedStdImageField(
         'Фотографія (головна)',
         upload_to=RandomFileName(PHOTO_PATH),
-        variations=update_with_metadata_variations({}))
+        variations=update_with_metadata_variations({}),
+        variations_field='photo_variations')
+    photo_variations = models.TextField(
+        'Варіації фотографії (головної)', blank=True, editable=False)
 
     photo_square = FixedStdImageField(
         'Фотографія (квадратна)',
         upload_to=RandomFileName(PHOTO_PATH),
         variations={
-            'square': {'width': 480, 'height': 480, 'crop': True},
-        })
+            'square': {
+                'width': 480,
+                'height': 480,
+                'crop': True,
+                'formats': FixedStdImageField.FORMATS,
+                'densities': (2, )},
+        },
+        variations_field='photo_square_variations')
+    photo_square_variations = models.TextField(
+        'Варіації фотографії (квадратної)', blank=True, editable=False)
 
     photo_high = FixedStdImageField(
         'Фотографія (висока)',
@@ -628,8 +711,13 @@ class City(MetadataMixin, models.Model, metaclass=TransMeta):
             'high': {
                 'width': 400,
                 'height': FixedStdImageField.MAX_HEIGHT,
-                'crop': True},
-        })
+                'crop': True,
+                'formats': FixedStdImageField.FORMATS,
+                'densities': (2, )},
+        },
+        variations_field='photo_high_variations')
+    photo_high_variations = models.TextField(
+        'Варіації фотографії (високої)', blank=True, editable=False)
 
     name = models.CharField('Назва', max_length=100, unique=True)
 
@@ -652,6 +740,10 @@ class City(MetadataMixin, models.Model, metaclass=TransMeta):
 class Centre(MetadataMixin, models.Model, metaclass=TransMeta):
     STATIC_PATH_FORMAT = 'centres/{id}'
 
+    METADATA_RELATED_MODELS = (City, )
+
+    NESTED_LIMIT = {'projects': 12, 'events': 12}
+
     city = models.OneToOneField(
         City, null=True, on_delete=models.SET_NULL
     )
@@ -764,6 +856,7 @@ class CentreSubpage(MetadataMixin, models.Model, metaclass=TransMeta):
     STATIC_PATH_FORMAT = (
         'centres/{centre_id}/'
         'subpages/{centre_subpage_id}/{centre_subpage_slug}')
+    STATIC_PATH_LOOKUP = 'centre_subpage_id'
 
     centre = models.ForeignKey(
         Centre, on_delete=models.CASCADE, related_name='centres_subpages',
@@ -827,19 +920,96 @@ class CentreSubpage(MetadataMixin, models.Model, metaclass=TransMeta):
         }
 
 
+class CentreDocumentManager(models.Manager):
+    def get_document(self, centre_id):
+        '''
+        Returns deserialized document or `None` if document is stale or
+        has not been built yet
+        '''
+        document = (
+            super(CentreDocumentManager, self).get_queryset()
+            .filter(centre_id=centre_id, is_stale=False)
+            .values_list('document', flat=True)
+            .first())
+
+        if document is None:
+            return None
+
+        return json.loads(document, object_pairs_hook=OrderedDict)
+
+    def mark_stale(self):
+        '''
+        Revision is incremented along, so that a document serialized before
+        the change would not be stored as a fresh one
+        '''
+        return (
+            super(CentreDocumentManager, self).get_queryset()
+            .update(is_stale=True, revision=models.F('revision') + 1))
+
+    def store_document(self, centre, revision, data):
+        '''
+        Stores document only if it was not marked stale since `revision`
+        was read, returns whether document was stored
+        '''
+        updated = (
+            super(CentreDocumentManager, self).get_queryset()
+            .filter(centre=centre, revision=revision)
+            .update(
+                document=json.dumps(data, cls=JSONEncoder),
+                is_stale=False,
+                built_at=timezone.now()))
+
+        return bool(updated)
+
+
+class CentreDocument(models.Model):
+    '''
+    Materialized fully serialized Centre detail representation, so that
+    Centre detail is served by a single primary key lookup. Documents are
+    marked stale on any change of Centre or its related content and rebuilt
+    in background by `build_centre_documents` command
+    '''
+    centre = models.OneToOneField(
+        Centre,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='document',
+    )
+    document = models.TextField(blank=True)
+    is_stale = models.BooleanField(default=True)
+    revision = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(null=True, blank=True)
+
+    objects = CentreDocumentManager()
+
+    class Meta:
+        db_table = get_table_name('centres', 'documents')
+
+    def __str__(self):
+        return str(self.centre)
+
+
 # Participant
 
 class Participant(models.Model, metaclass=TransMeta):
     PHOTO_PATH = 'participants/photos/'
 
     variations = {
-        'square': {'width': 480, 'height': 480, 'crop': True},
+        'square': {
+            'width': 480,
+            'height': 480,
+            'crop': True,
+            'formats': FixedStdImageField.FORMATS,
+            'densities': (2, )},
     }
 
     photo = FixedStdImageField(
         'Фотографія',
         upload_to=RandomFileName(PHOTO_PATH),
-        variations=variations)
+        variations=variations,
+        variations_field='photo_variations')
+    photo_variations = models.TextField(
+        'Варіації фотографії', blank=True, editable=False)
 
     centre = models.ForeignKey(
         Centre,
@@ -980,6 +1150,98 @@ class Worksheet(models.Model):
 
 # Scraping
 
+class ScrapingManager(models.Manager):
+    def upsert(self, path, head, submitted_at=None):
+        return self.upsert_many([(path, head, submitted_at)])[0]
+
+    def upsert_many(self, heads):
+        '''
+        Stores `(path, head, submitted_at)` triples with a single multi-row
+        `INSERT ... ON DUPLICATE KEY UPDATE` statement, so concurrent
+        requests for the same path never race into duplicates. Stored row is
+        updated only if incoming head was submitted later, so processes
+        flushing heads of the same path out of order never overwrite newer
+        head with older one. Signals are not sent by raw query, so content
+        version is bumped explicitly
+        '''
+        scrapings = [
+            self.model(
+                path=path, head=head,
+                submitted_at=submitted_at or timezone.now())
+            for path, head, submitted_at in heads]
+        for scraping in scrapings:
+            scraping.set_hashes()
+
+        if not scrapings:
+            return scrapings
+
+        if connection.vendor != 'mysql':
+            for scraping in scrapings:
+                self.upsert_newer(scraping)
+
+            return scrapings
+
+        quote_name = connection.ops.quote_name
+
+        columns = ('path_hash', 'path', 'head', 'head_hash', 'submitted_at')
+        updated_columns = ('path', 'head', 'head_hash')
+
+        def update_if_newer(column):
+            return (
+                '{column} = IF(VALUES({submitted_at}) > {submitted_at}, '
+                'VALUES({column}), {column})'.format(
+                    column=quote_name(column),
+                    submitted_at=quote_name('submitted_at')))
+
+        ''' Assignments are evaluated in order, so time is updated last '''
+        assignments = [
+            update_if_newer(column)
+            for column in updated_columns + ('submitted_at', )]
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO {table} ({columns}) VALUES {values} '
+                'ON DUPLICATE KEY UPDATE {assignments}'.format(
+                    table=quote_name(self.model._meta.db_table),
+                    columns=', '.join(
+                        quote_name(column) for column in columns),
+                    values=', '.join(
+                        ['(%s)' % ', '.join(['%s'] * len(columns))] *
+                        len(scrapings)),
+                    assignments=', '.join(assignments)),
+                [
+                    connection.ops.adapt_datetimefield_value(value)
+                    if column == 'submitted_at' else value
+                    for scraping in scrapings
+                    for column, value in zip(columns, (
+                        scraping.path_hash, scraping.path, scraping.head,
+                        scraping.head_hash, scraping.submitted_at))
+                ])
+
+        content_version.bump_on_commit(self.model)
+
+        return scrapings
+
+    def upsert_newer(self, scraping):
+        updated = self.filter(
+            path_hash=scraping.path_hash,
+            submitted_at__lt=scraping.submitted_at,
+        ).update(
+            path=scraping.path,
+            head=scraping.head,
+            head_hash=scraping.head_hash,
+            submitted_at=scraping.submitted_at)
+
+        if updated:
+            content_version.bump_on_commit(self.model)
+        elif not self.filter(path_hash=scraping.path_hash).exists():
+            try:
+                with transaction.atomic():
+                    scraping.save()
+            except IntegrityError:
+                pass
+
+
 class Scraping(models.Model):
     '''
     Model is designed to store rendered HTML inside `<head>` tag. This is done
@@ -987,10 +1249,139 @@ class Scraping(models.Model):
     rendered entirely on the client side (for React.js in this particular case)
     '''
     path = models.CharField(max_length=500)
+    path_hash = models.CharField(max_length=40, unique=True, editable=False)
     head = models.TextField()
+    head_hash = models.CharField(max_length=40, editable=False)
+    submitted_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = ScrapingManager()
 
     class Meta:
         db_table = get_table_name('scrapings')
 
     def __str__(self):
         return self.path or self.__class__.__name__
+
+    def save(self, *args, **kwargs):
+        self.set_hashes()
+
+        super(Scraping, self).save(*args, **kwargs)
+
+    def set_hashes(self):
+        self.path_hash = self.get_path_hash(self.path)
+        self.head_hash = self.get_head_hash(self.head)
+
+    @staticmethod
+    def normalize_path(path):
+        '''
+        Leaves path part of URL only, with a single leading and no trailing
+        slash, so that `/events/1/` and `events/1` are the same path
+        '''
+        path = urlsplit(path.strip()).path
+
+        return '/' + path.strip('/')
+
+    @classmethod
+    def get_path_hash(cls, path):
+        return hashlib.sha1(
+            cls.normalize_path(path).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_head_hash(head):
+        return hashlib.sha1(head.encode('utf-8')).hexdigest()
+
+
+# Image variation job
+
+class ImageVariationJobManager(models.Manager):
+    def filter_queued(self):
+        return super(ImageVariationJobManager, self).get_queryset().filter(
+            status__in=(
+                self.model.STATUS_PENDING, self.model.STATUS_PROCESSING))
+
+    def filter_claimable(self):
+        '''
+        Pending jobs whose attempt time has come and jobs that got stuck in
+        processing (e.g. worker was killed) for longer than
+        `PROCESSING_TIMEOUT`
+        '''
+        now = timezone.now()
+        stuck_at = now - timedelta(seconds=self.model.PROCESSING_TIMEOUT)
+
+        return (
+            super(ImageVariationJobManager, self).get_queryset()
+            .filter(
+                models.Q(
+                    status=self.model.STATUS_PENDING,
+                    next_attempt_at__lte=now) |
+                models.Q(
+                    status=self.model.STATUS_PROCESSING,
+                    started_at__lt=stuck_at))
+            .order_by('next_attempt_at', 'id'))
+
+
+class ImageVariationJob(models.Model):
+    '''
+    Queued rendering of variations of an uploaded image, processed in
+    background by `render_image_variations` command
+    '''
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUSES = (
+        (STATUS_PENDING, 'В черзі'),
+        (STATUS_PROCESSING, 'Обробляється'),
+        (STATUS_DONE, 'Виконано'),
+        (STATUS_FAILED, 'Помилка'),
+    )
+
+    PROCESSING_TIMEOUT = 60 * 10
+
+    label = models.CharField(max_length=100)
+    field_name = models.CharField(max_length=100)
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=10, choices=STATUSES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ImageVariationJobManager()
+
+    class Meta:
+        db_table = get_table_name('images', 'variations', 'jobs')
+
+        index_together = (('status', 'next_attempt_at'), )
+
+    def __str__(self):
+        return self.file_name or self.__class__.__name__
+
+    def mark_done(self):
+        self.status = self.STATUS_DONE
+        self.processed_at = timezone.now()
+        self.save(update_fields=['status', 'processed_at'])
+
+    def mark_failed(self, error, max_attempts, retry_delay):
+        '''
+        Job returns to queue with exponentially growing delay until it runs
+        out of attempts
+        '''
+        self.attempts += 1
+        self.last_error = error
+        self.processed_at = timezone.now()
+
+        if self.attempts >= max_attempts:
+            self.status = self.STATUS_FAILED
+        else:
+            self.status = self.STATUS_PENDING
+            self.next_attempt_at = self.processed_at + timedelta(
+                seconds=retry_delay * 2 ** (self.attempts - 1))
+
+        self.save(update_fields=[
+            'status', 'attempts', 'last_error', 'processed_at',
+            'next_attempt_at'])
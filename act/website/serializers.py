@@ -5,9 +5,15 @@ from django.db.models import Prefetch
 
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.reverse import reverse
+from rest_framework.utils.urls import replace_query_param
 
-from act.serializers import StdImageSerializer
+from act.serializers import (
+    StdImageSerializer, annotate_relation_count, limit_per_relation)
+from act.services.transmeta import canonical_fieldname
+from act.services.neighbour_index import NeighbourIndex
 from act.services.mailer import MailerMixin
+from act.services.scraping_ingestion import scraping_ingestion
 
 from .models import (
     IntroContent, AboutContent, GoalContent, DisclaimerContent,
@@ -25,10 +31,57 @@ from .validators import (
 )
 
 
+class BoundedRelationsSerializerMixin():
+    '''
+    Nested collections listed in model's `NESTED_LIMIT` are capped to the
+    first N records. Each of them is accompanied by `<relation>_count` with
+    the total number of related records and `<relation>_link` to the list
+    endpoint filtered by the owner record, so the rest could be fetched
+    there. `relation_links` maps relation to `(view name, query parameter,
+    owner attribute)`. Caps and counts are applied within the queryset by
+    `set_bounded_loading()`
+    '''
+    relation_links = {}
+
+    def get_relation_link(self, obj, relation_name):
+        view_name, query_param, attribute = self.relation_links[relation_name]
+
+        value = getattr(obj, attribute)
+        if value is None:
+            return None
+
+        url = reverse(view_name, request=self.context.get('request'))
+
+        return replace_query_param(url, query_param, value)
+
+    @staticmethod
+    def set_bounded_loading(queryset, model, relation_name, prefetch_queryset):
+        '''
+        Returns `(queryset, prefetch)` pair for relation capped by
+        `model.NESTED_LIMIT`
+        '''
+        queryset = annotate_relation_count(queryset, relation_name)
+
+        prefetch = Prefetch(
+            relation_name,
+            queryset=limit_per_relation(
+                prefetch_queryset, model, relation_name,
+                model.NESTED_LIMIT[relation_name]))
+
+        return queryset, prefetch
+
+
 class ExcludableModelSerializer(serializers.ModelSerializer):
     '''
-    Allows to exclude fields to avoid duplicate nested model serialization
+    Allows to exclude fields to avoid duplicate nested model serialization.
+    Top level serializer also supports sparse fieldsets, requested by comma
+    separated `fields` (fields to keep) and `omit` (fields to drop) query
+    parameters. Model fields that are not serialized could be deferred from
+    SQL query with `set_deferred_loading()`
     '''
+    FIELDS_QUERY_PARAM = 'fields'
+    OMIT_QUERY_PARAM = 'omit'
+
     def __init__(self, *args, **kwargs):
         exclude_fields = kwargs.pop('exclude_fields', None)
         super(ExcludableModelSerializer, self).__init__(*args, **kwargs)
@@ -37,51 +90,97 @@ class ExcludableModelSerializer(serializers.ModelSerializer):
             for field_name in exclude_fields:
                 self.fields.pop(field_name)
 
+        request = self.context.get('request')
+
+        if request is not None:
+            sparse_exclude_fields = self.get_sparse_exclude_fields(
+                request, self.fields.keys())
+
+            for field_name in sparse_exclude_fields:
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_sparse_exclude_fields(cls, request, field_names):
+        query_params = getattr(request, 'query_params', request.GET)
+
+        field_names = set(field_names)
+        exclude_fields = set()
+
+        fields = query_params.get(cls.FIELDS_QUERY_PARAM)
+        if fields:
+            exclude_fields |= field_names - set(fields.split(','))
+
+        omit = query_params.get(cls.OMIT_QUERY_PARAM)
+        if omit:
+            exclude_fields |= field_names & set(omit.split(','))
+
+        return exclude_fields
+
+    @classmethod
+    def get_deferred_fields(cls, exclude_fields=()):
+        '''
+        Returns names of model's own columns (translations included) that
+        are not serialized. Relations are never deferred, as they could be
+        traversed with `select_related()`, and neither are variation maps
+        of serialized image fields
+        '''
+        serialized_fields = set(cls.Meta.fields) - set(exclude_fields)
+
+        for field in cls.Meta.model._meta.concrete_fields:
+            variations_field = getattr(field, 'variations_field', None)
+            if variations_field and field.name in serialized_fields:
+                serialized_fields.add(variations_field)
+
+        return [
+            field.name for field in cls.Meta.model._meta.concrete_fields
+            if not (field.primary_key or field.is_relation) and
+            canonical_fieldname(field) not in serialized_fields]
+
+    @classmethod
+    def set_deferred_loading(cls, queryset, request):
+        exclude_fields = cls.get_sparse_exclude_fields(
+            request, cls.Meta.fields)
+
+        deferred_fields = cls.get_deferred_fields(exclude_fields)
+        if deferred_fields:
+            queryset = queryset.defer(*deferred_fields)
+
+        return queryset
+
 
 class AdjacentObjectsSerializerMixin(serializers.Serializer):
     '''
-    This mixin adds to a serializer two fields that contain ids of previous
-    and next records in database for a given serializer's model instance.
-    It works ONLY when given model's Meta class `ordering` attribute is
-    specified and ONLY if there's one or two ordering fields (with second
-    beeing a primary key). No purpose for making it dynamic for now
+    This mixin adds to a serializer two fields that contain ids and slugs of
+    previous and next records in database for a given serializer's model
+    instance. It works ONLY when given model's Meta class `ordering`
+    attribute is specified. Adjacent records are looked up in an in-memory
+    neighbour index restricted by `adjacent_filter_kwargs`, so no extra
+    queries are made per serialized instance
     '''
     prev_object = serializers.SerializerMethodField()
     next_object = serializers.SerializerMethodField()
 
-    def get_adjacent_instance(self, instance, method):
-        Meta, Model = instance._meta, instance._meta.model
-        adjacent_instance = None
+    adjacent_filter_kwargs = {}
 
-        if hasattr(Meta, 'ordering') and Meta.ordering:
-            ordering_field = Meta.ordering[0].replace('-', '')
+    def get_adjacent_objects(self, instance):
+        Meta, Model = instance._meta, instance._meta.model
 
-            get_by = getattr(Model, '%s_by_%s' % (method, ordering_field))
+        if not (hasattr(Meta, 'ordering') and Meta.ordering):
+            return None, None
 
-            try:
-                adjacent_instance = get_by(instance)
-            except Model.DoesNotExist:
-                pass
+        neighbour_index = NeighbourIndex(Model, self.adjacent_filter_kwargs)
 
-        return adjacent_instance
+        return neighbour_index.get_adjacent(instance)
 
     def get_prev_object(self, instance):
-        prev_instance = self.get_adjacent_instance(instance, 'get_previous')
+        prev_object, _ = self.get_adjacent_objects(instance)
 
-        return self.serialize_adjacent_object(prev_instance)
+        return prev_object
 
     def get_next_object(self, instance):
-        next_instance = self.get_adjacent_instance(instance, 'get_next')
-
-        return self.serialize_adjacent_object(next_instance)
+        _, next_object = self.get_adjacent_objects(instance)
 
-    def serialize_adjacent_object(self, instance):
-        if instance and hasattr(instance, 'slug'):
-            adjacent_object = {'id': instance.id, 'slug': instance.slug}
-        else:
-            adjacent_object = None
-
-        return adjacent_object
+        return next_object
 
 
 # Content
@@ -227,7 +326,7 @@ class ProjectListSerializer(ExcludableModelSerializer):
         model = Project
         fields = (
             'id', 'project_area', 'centres',
-            'started_at', 'modified_at', 'image', 'title', 'content',
+            'started_at', 'modified_at', 'image', 'title', 'excerpt',
             'is_active', 'slug',
         )
 
@@ -266,12 +365,15 @@ class EventListSerializer(ExcludableModelSerializer):
         model = Event
         fields = (
             'id', 'event_category', 'centres', 'project',
-            'created_at', 'image', 'title', 'content', 'is_active', 'slug',
+            'created_at', 'image', 'title', 'excerpt', 'is_active', 'slug',
         )
 
     @staticmethod
     def set_eager_loading(queryset):
         queryset = queryset.select_related('event_category', 'project')
+        queryset = queryset.defer(*[
+            'project__%s' % field_name
+            for field_name in ProjectListSerializer.get_deferred_fields()])
         queryset = queryset.prefetch_related(
             Prefetch('centres', queryset=Centre.objects.select_related('city'))
         )
@@ -282,35 +384,51 @@ class EventListSerializer(ExcludableModelSerializer):
 # Project (detail)
 
 class ProjectDetailSerializer(
-    AdjacentObjectsSerializerMixin, ExcludableModelSerializer
+    BoundedRelationsSerializerMixin,
+    AdjacentObjectsSerializerMixin,
+    ExcludableModelSerializer
 ):
     image = StdImageSerializer(read_only=True)
 
+    adjacent_filter_kwargs = {'is_active': True}
+
     project_area = ProjectAreaSerializer(read_only=True)
     project_attached_documents = ProjectAttachedDocumentSerializer(
         read_only=True, many=True)
     centres = CentreCitySerializer(read_only=True, many=True)
     events = EventListSerializer(
         exclude_fields=['centres', 'project'], read_only=True, many=True)
+    events_count = serializers.IntegerField(read_only=True)
+    events_link = serializers.SerializerMethodField()
+
+    relation_links = {
+        'events': ('events_list', 'project', 'id'),
+    }
 
     class Meta:
         model = Project
         fields = (
             'id', 'project_area', 'project_attached_documents',
-            'centres', 'events',
+            'centres', 'events', 'events_count', 'events_link',
             'started_at', 'modified_at', 'image', 'title', 'content',
             'is_active', 'slug',
             'prev_object', 'next_object',
         )
 
+    def get_events_link(self, obj):
+        return self.get_relation_link(obj, 'events')
+
     @staticmethod
     def set_eager_loading(queryset):
+        queryset, events = ProjectDetailSerializer.set_bounded_loading(
+            queryset, Project, 'events',
+            Event.objects.select_related('event_category').defer(
+                *EventListSerializer.get_deferred_fields()))
+
         queryset = queryset.select_related('project_area')
         queryset = queryset.prefetch_related(
             'project_attached_documents',
-            Prefetch(
-                'events',
-                queryset=Event.objects.select_related('event_category')),
+            events,
             Prefetch(
                 'centres',
                 queryset=Centre.objects.select_related('city'))
@@ -326,6 +444,8 @@ class EventDetailSerializer(
 ):
     image = StdImageSerializer(read_only=True)
 
+    adjacent_filter_kwargs = {'is_active': True}
+
     event_category = EventCategorySerializer(read_only=True)
     centres = CentreCitySerializer(read_only=True, many=True)
     project = ProjectListSerializer(read_only=True)
@@ -344,6 +464,9 @@ class EventDetailSerializer(
     @staticmethod
     def set_eager_loading(queryset):
         queryset = queryset.select_related('event_category', 'project')
+        queryset = queryset.defer(*[
+            'project__%s' % field_name
+            for field_name in ProjectListSerializer.get_deferred_fields()])
         queryset = queryset.prefetch_related(
             'event_attached_documents',
             Prefetch('centres', queryset=Centre.objects.select_related('city'))
@@ -372,32 +495,53 @@ class CentreSubpageSerializer(ExcludableModelSerializer):
 
 # Centre
 
-class CentreListSerializer(serializers.ModelSerializer):
+class CentreListSerializer(
+    BoundedRelationsSerializerMixin, serializers.ModelSerializer
+):
     city = CitySerializer(read_only=True)
     projects = ProjectListSerializer(
         exclude_fields=['centres'], read_only=True, many=True
     )
+    projects_count = serializers.IntegerField(read_only=True)
+    projects_link = serializers.SerializerMethodField()
     events = EventListSerializer(
         exclude_fields=['centres', 'project'], read_only=True, many=True
     )
+    events_count = serializers.IntegerField(read_only=True)
+    events_link = serializers.SerializerMethodField()
+
+    relation_links = {
+        'projects': ('projects_list', 'centres', 'city_id'),
+        'events': ('events_list', 'centres__city', 'city_id'),
+    }
 
     class Meta:
         model = Centre
         fields = (
-            'id', 'city', 'projects', 'events',
+            'id', 'city',
+            'projects', 'projects_count', 'projects_link',
+            'events', 'events_count', 'events_link',
         )
 
+    def get_projects_link(self, obj):
+        return self.get_relation_link(obj, 'projects')
+
+    def get_events_link(self, obj):
+        return self.get_relation_link(obj, 'events')
+
     @staticmethod
     def set_eager_loading(queryset):
+        queryset, projects = CentreListSerializer.set_bounded_loading(
+            queryset, Centre, 'projects',
+            Project.objects.select_related('project_area').defer(
+                *ProjectListSerializer.get_deferred_fields()))
+        queryset, events = CentreListSerializer.set_bounded_loading(
+            queryset, Centre, 'events',
+            Event.objects.select_related('event_category').defer(
+                *EventListSerializer.get_deferred_fields()))
+
         queryset = queryset.select_related('city')
-        queryset = queryset.prefetch_related(
-            Prefetch(
-                'projects',
-                queryset=Project.objects.select_related('project_area')),
-            Prefetch(
-                'events',
-                queryset=Event.objects.select_related('event_category'))
-        )
+        queryset = queryset.prefetch_related(projects, events)
 
         return queryset
 
@@ -434,15 +578,20 @@ class CentreDetailSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def set_eager_loading(queryset):
-        queryset = queryset.select_related('city', 'contact', 'top_event')
+        queryset = queryset.select_related(
+            'city', 'contact', 'top_event', 'top_event__event_category',
+            'top_event__project', 'top_event__project__project_area')
         queryset = queryset.prefetch_related(
             Prefetch('participants', queryset=Participant.objects.all()),
             Prefetch(
                 'projects',
-                queryset=Project.objects.select_related('project_area')),
+                queryset=Project.objects.select_related('project_area').defer(
+                    *ProjectListSerializer.get_deferred_fields())),
             Prefetch(
                 'events',
-                queryset=Event.objects.select_related('event_category'))
+                queryset=Event.objects.select_related('event_category').defer(
+                    *EventListSerializer.get_deferred_fields())),
+            'centres_subpages',
         )
 
         return queryset
@@ -491,11 +640,8 @@ class WorksheetSerializer(MailerMixin, serializers.ModelSerializer):
         if not worksheet.id:
             raise Worksheet.DoesNotExist('Worksheet is not yet created')
 
-        worksheet_subject = worksheet.worksheet_email.subject
-        worksheet_body = worksheet.worksheet_email()
-
-        super(WorksheetSerializer, self).send_email(
-            worksheet_subject, worksheet_body, None, None)
+        super(WorksheetSerializer, self).queue_email(
+            worksheet.worksheet_email.subject, worksheet, 'worksheet_email')
 
 
 # Scraping
@@ -505,12 +651,13 @@ class ScrapingSerializer(serializers.ModelSerializer):
         model = Scraping
         fields = ('path', 'head', )
 
-    def create(self, validated_data):
+    def submit(self):
+        '''
+        Hands validated head over to ingestion instead of saving it, as
+        write is coalesced. Returns ingestion status
+        '''
         # Decode URL encoded (to avoid POST special characters) path and head
-        head = unquote(validated_data.get('head', None)).strip()
-        path = unquote(validated_data.get('path', None)).strip()
-
-        scraping, created = Scraping.objects.update_or_create(
-            path=path, defaults={'path': path, 'head': head})
+        head = unquote(self.validated_data.get('head', None)).strip()
+        path = unquote(self.validated_data.get('path', None)).strip()
 
-        return scraping
+        return scraping_ingestion.submit(path, head)
@@ -0,0 +1,49 @@
+# act/website/services.py
+from act.utils import get_default_request
+
+from .models import Centre, CentreDocument
+from .serializers import CentreDetailSerializer
+
+
+class CentreDocumentBuilder():
+    '''
+    Builds materialized Centre detail documents. Documents are built with
+    request addressed to DEFAULT_URL, so that absolute URLs within them do
+    not depend on a request that happened to trigger the build
+    '''
+    serializer_class = CentreDetailSerializer
+
+    def get_queryset(self):
+        return self.serializer_class.set_eager_loading(Centre.objects.all())
+
+    def build(self, centre):
+        document, _ = CentreDocument.objects.get_or_create(centre=centre)
+
+        serializer = self.serializer_class(
+            centre, context={'request': get_default_request()})
+
+        CentreDocument.objects.store_document(
+            centre, document.revision, serializer.data)
+
+        return serializer.data
+
+    def build_stale(self):
+        '''
+        Builds documents that are stale or missing, returns built count
+        '''
+        centres = self.get_queryset().exclude(document__is_stale=False)
+
+        built = 0
+        for centre in centres:
+            self.build(centre)
+            built += 1
+
+        return built
+
+    def build_all(self):
+        built = 0
+        for centre in self.get_queryset():
+            self.build(centre)
+            built += 1
+
+        return built
@@ -0,0 +1,45 @@
+# act/website/signals.py
+from django.db.models.signals import post_save, post_delete, m2m_changed
+
+from .models import (
+    ProjectArea, Project,
+    EventCategory, Event,
+    City, Participant, Contact,
+    Centre, CentreSubpage, CentreDocument,
+)
+
+'''
+Every model that takes part in Centre detail serialization. Centres are
+few, so any change simply marks all of the documents stale
+'''
+CENTRE_DOCUMENT_MODELS = (
+    ProjectArea, Project,
+    EventCategory, Event,
+    City, Participant, Contact,
+    Centre, CentreSubpage,
+)
+
+
+def mark_centre_documents_stale(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        CentreDocument.objects.mark_stale()
+
+
+def connect_centre_documents_signals():
+    for model in CENTRE_DOCUMENT_MODELS:
+        dispatch_uid = 'centre_documents_%s' % model._meta.label_lower
+
+        post_save.connect(
+            mark_centre_documents_stale,
+            sender=model,
+            dispatch_uid=dispatch_uid)
+        post_delete.connect(
+            mark_centre_documents_stale,
+            sender=model,
+            dispatch_uid=dispatch_uid)
+
+    for through in (Centre.projects.through, Centre.events.through):
+        m2m_changed.connect(
+            mark_centre_documents_stale,
+            sender=through,
+            dispatch_uid='centre_documents_%s' % through._meta.label_lower)
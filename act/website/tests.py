@@ -1 +1,161 @@
 # act_project/act/website/tests.py
+import io
+import os
+import shutil
+import zipfile
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from act.fields import VariationMapStdImageField
+from act.services.image_variations import get_renditions
+from act.services.query_plans import SUPPORTED_VENDORS, explain_hot_queries
+from act.validators import FileContentTypeValidator
+
+from metadata.models import Metadata
+from subscription.models import Subscriber
+
+from .models import AttachedDocument, Event, Project, Scraping
+
+
+class VariationRenditionsDeletionTest(SimpleTestCase):
+    variations = {
+        'thumbnail': {
+            'width': 10,
+            'height': 10,
+            'formats': ('WEBP', ),
+            'densities': (2, ),
+        },
+    }
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+
+        self.field = VariationMapStdImageField(
+            variations=self.variations,
+            render_async=False,
+            storage=self.storage)
+        self.field.name = 'image'
+
+        self.storage.save('image.jpg', ContentFile(b'original'))
+
+        variation = self.field.variations['thumbnail']
+        variation_name = self.field.attr_class.get_variation_name(
+            'image.jpg', variation['name'])
+
+        self.file_names = ['image.jpg'] + [
+            rendition_name
+            for rendition_name, _, _ in get_renditions(
+                variation, variation_name)]
+
+        for file_name in self.file_names[1:]:
+            self.storage.save(file_name, ContentFile(b'rendition'))
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_delete_removes_renditions(self):
+        ''' The same call django_cleanup makes for replaced files '''
+        instance = type('Instance', (), {})()
+        image = self.field.attr_class(instance, self.field, 'image.jpg')
+
+        image.delete(save=False)
+
+        for file_name in self.file_names:
+            self.assertFalse(self.storage.exists(file_name), file_name)
+
+
+class AttachedDocumentContentTypeTest(SimpleTestCase):
+    validator = AttachedDocument.content_type_validator
+
+    @staticmethod
+    def build_zip(names, padding=64 * 1024):
+        '''
+        Builds zip container, first member of which is large enough to push
+        the rest beyond sniffed header
+        '''
+        content = io.BytesIO()
+        with zipfile.ZipFile(content, 'w', zipfile.ZIP_STORED) as container:
+            container.writestr('docProps/thumbnail.jpeg', os.urandom(
+                max(padding, FileContentTypeValidator.HEADER_SIZE * 2)))
+            for name in names:
+                container.writestr(name, '<xml/>')
+
+        return content.getvalue()
+
+    def test_ooxml_documents_are_accepted(self):
+        for extension, directory in (
+                ('docx', 'word'), ('xlsx', 'xl'), ('pptx', 'ppt')):
+            document = SimpleUploadedFile(
+                'document.%s' % extension,
+                self.build_zip([
+                    '[Content_Types].xml', '%s/document.xml' % directory]))
+
+            self.validator(document)
+
+            self.assertEqual(document.tell(), 0)
+
+    def test_plain_zip_is_rejected(self):
+        archive = SimpleUploadedFile(
+            'archive.docx', self.build_zip(['readme.txt']))
+
+        with self.assertRaises(ValidationError):
+            self.validator(archive)
+
+
+class HotQueryPlanTest(TestCase):
+    '''
+    Tables are filled with enough rows of selective data, so that planner
+    prefers indexes the same way it does against production data
+    '''
+    ROWS = 1000
+    ACTIVE_EVERY = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        Event.objects.bulk_create(
+            Event(title_uk='Event %d' % index,
+                  is_active=not index % cls.ACTIVE_EVERY)
+            for index in range(cls.ROWS))
+        Project.objects.bulk_create(
+            Project(title_uk='Project %d' % index)
+            for index in range(cls.ROWS))
+        Subscriber.objects.bulk_create(
+            Subscriber(email='subscriber%d@localhost' % index,
+                       is_active=not index % cls.ACTIVE_EVERY)
+            for index in range(cls.ROWS))
+        Scraping.objects.bulk_create(
+            Scraping(path='/events/%d' % index,
+                     path_hash=Scraping.get_path_hash('/events/%d' % index),
+                     head='<title>%d</title>' % index)
+            for index in range(cls.ROWS))
+        Metadata.objects.bulk_create(
+            Metadata(url_name='page_%d' % index)
+            for index in range(cls.ROWS))
+
+        if connection.vendor == 'mysql':
+            tables = [
+                model._meta.db_table
+                for model in (Event, Project, Subscriber, Scraping, Metadata)]
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE TABLE %s' % ', '.join(
+                    connection.ops.quote_name(table) for table in tables))
+                cursor.fetchall()
+
+    def test_hot_queries_do_not_scan_full_tables(self):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            self.skipTest(
+                'Query plans of %s are not supported' % connection.vendor)
+
+        full_scans = [
+            '%s: %s %s' % (name, table or '', access)
+            for name, table, access, is_full_scan in explain_hot_queries()
+            if is_full_scan]
+
+        self.assertEqual(full_scans, [])
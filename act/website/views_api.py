@@ -1,6 +1,7 @@
 # act_project/act/website/views_api.py
 from django.http import Http404
 
+from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.generics import (
     GenericAPIView, ListAPIView, RetrieveAPIView,
@@ -14,15 +15,17 @@ from rest_framework.pagination import (
 
 from django_filters import rest_framework as django_filters
 
+from act.pagination import KeysetPagination
 from act.serializers import set_eager_loading
+from act.views_api import CachedResponseMixin
 
 from .models import (
     IntroContent, AboutContent, GoalContent, DisclaimerContent,
     Sponsor, Social, Activity, Partner,
-    ProjectArea, Project,
-    EventCategory, Event,
+    ProjectAttachedDocument, ProjectArea, Project,
+    EventAttachedDocument, EventCategory, Event,
     City, Participant, Contact,
-    Centre, CentreSubpage,
+    Centre, CentreSubpage, CentreDocument,
     Worksheet,
     Scraping,
 )
@@ -38,11 +41,12 @@ from .serializers import (
     WorksheetSerializer,
     ScrapingSerializer,
 )
+from .services import CentreDocumentBuilder
 
 
 # Content
 
-class SingularItemAPIView(GenericAPIView):
+class SingularItemAPIView(CachedResponseMixin, GenericAPIView):
     '''
     This view is tricky, as it overrides common behavior of `get_object()`
     method. It does not require positional `pk` argument, because it's
@@ -86,55 +90,55 @@ class DisclaimerContentSingular(SingularItemAPIView):
 
 # Sponsor
 
-class SponsorList(ListAPIView):
+class SponsorList(CachedResponseMixin, ListAPIView):
     serializer_class = SponsorSerializer
     queryset = Sponsor.objects.all()
 
 
-class SponsorDetail(RetrieveAPIView):
+class SponsorDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = SponsorSerializer
     queryset = Sponsor.objects.all()
 
 
 # Social
 
-class SocialList(ListAPIView):
+class SocialList(CachedResponseMixin, ListAPIView):
     serializer_class = SocialSerializer
     queryset = Social.objects.all()
 
 
-class SocialDetail(RetrieveAPIView):
+class SocialDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = SocialSerializer
     queryset = Social.objects.all()
 
 
 # Activity
 
-class ActivityList(ListAPIView):
+class ActivityList(CachedResponseMixin, ListAPIView):
     serializer_class = ActivitySerializer
     queryset = Activity.objects.all()
 
 
-class ActivityDetail(RetrieveAPIView):
+class ActivityDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = ActivitySerializer
     queryset = Activity.objects.all()
 
 
 # Partner
 
-class PartnerList(ListAPIView):
+class PartnerList(CachedResponseMixin, ListAPIView):
     serializer_class = PartnerSerializer
     queryset = Partner.objects.all()
 
 
 # ProjectArea
 
-class ProjectAreaList(ListAPIView):
+class ProjectAreaList(CachedResponseMixin, ListAPIView):
     serializer_class = ProjectAreaSerializer
     queryset = ProjectArea.objects.all()
 
 
-class ProjectAreaDetail(RetrieveAPIView):
+class ProjectAreaDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = ProjectAreaSerializer
     queryset = ProjectArea.objects.all()
 
@@ -155,6 +159,14 @@ class ProjectPageNumberPagination(PageNumberPagination):
     page_query_param = 'page'
 
 
+class ProjectKeysetPagination(KeysetPagination):
+    page_size = Project.PAGE_SIZE['default']
+
+    ordering = Project._meta.ordering
+
+    cursor_query_param = 'cursor'
+
+
 class ProjectFilter(django_filters.FilterSet):
     centres = django_filters.ModelChoiceFilter(
         name="centres__city", queryset=City.objects.all())
@@ -164,8 +176,16 @@ class ProjectFilter(django_filters.FilterSet):
         fields = ['project_area', 'centres']
 
 
-class ProjectList(ListAPIView):
+class ProjectList(CachedResponseMixin, ListAPIView):
+    '''
+    Paginated by page number by default. Use `limit` query parameter for
+    limit/offset pagination, or `cursor` query parameter (empty for the
+    first page) for keyset pagination that avoids `OFFSET` and `COUNT(*)`
+    on large archives
+    '''
     serializer_class = ProjectListSerializer
+    cache_models = (
+        Project, ProjectArea, Centre, City, )
 
     pagination_class = ProjectPageNumberPagination
 
@@ -177,15 +197,21 @@ class ProjectList(ListAPIView):
         queryset = Project.objects.all()
 
         limit = self.request.query_params.get('limit', None)
+        cursor = self.request.query_params.get('cursor', None)
 
         if limit is not None:
             self.pagination_class = ProjectLimitOffsetPagination
+        elif cursor is not None:
+            self.pagination_class = ProjectKeysetPagination
 
         return queryset
 
 
-class ProjectDetail(RetrieveAPIView):
+class ProjectDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = ProjectDetailSerializer
+    cache_models = (
+        Project, ProjectArea, ProjectAttachedDocument, Centre, City,
+        Event, EventCategory, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -194,12 +220,12 @@ class ProjectDetail(RetrieveAPIView):
 
 # EventCategory
 
-class EventCategoryList(ListAPIView):
+class EventCategoryList(CachedResponseMixin, ListAPIView):
     serializer_class = EventCategorySerializer
     queryset = EventCategory.objects.all()
 
 
-class EventCategoryDetail(RetrieveAPIView):
+class EventCategoryDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = EventCategorySerializer
     queryset = EventCategory.objects.all()
 
@@ -220,14 +246,30 @@ class EventPageNumberPagination(PageNumberPagination):
     page_query_param = 'page'
 
 
+class EventKeysetPagination(KeysetPagination):
+    page_size = Event.PAGE_SIZE['default']
+
+    ordering = Event._meta.ordering
+
+    cursor_query_param = 'cursor'
+
+
 class EventFilter(django_filters.FilterSet):
     class Meta:
         model = Event
         fields = ['event_category', 'project', 'centres__city']
 
 
-class EventList(ListAPIView):
+class EventList(CachedResponseMixin, ListAPIView):
+    '''
+    Paginated by page number by default. Use `limit` query parameter for
+    limit/offset pagination, or `cursor` query parameter (empty for the
+    first page) for keyset pagination that avoids `OFFSET` and `COUNT(*)`
+    on large archives
+    '''
     serializer_class = EventListSerializer
+    cache_models = (
+        Event, EventCategory, Centre, City, Project, ProjectArea, )
 
     pagination_class = EventPageNumberPagination
 
@@ -239,15 +281,21 @@ class EventList(ListAPIView):
         queryset = Event.objects.all()
 
         limit = self.request.query_params.get('limit', None)
+        cursor = self.request.query_params.get('cursor', None)
 
         if limit is not None:
             self.pagination_class = EventLimitOffsetPagination
+        elif cursor is not None:
+            self.pagination_class = EventKeysetPagination
 
         return queryset
 
 
-class EventDetail(RetrieveAPIView):
+class EventDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = EventDetailSerializer
+    cache_models = (
+        Event, EventCategory, EventAttachedDocument, Centre, City,
+        Project, ProjectArea, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -256,19 +304,21 @@ class EventDetail(RetrieveAPIView):
 
 # City
 
-class CityList(ListAPIView):
+class CityList(CachedResponseMixin, ListAPIView):
     serializer_class = CitySerializer
     queryset = City.objects.all()
 
 
 # Participant
 
-class ParticipantList(ListAPIView):
+class ParticipantList(CachedResponseMixin, ListAPIView):
     '''
     You can use `head_office` quary parameter to get only head office
     participants (with `centre` foreign key that equals `NULL`)
     '''
     serializer_class = ParticipantSerializer
+    cache_models = (
+        Participant, Centre, City, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -284,12 +334,14 @@ class ParticipantList(ListAPIView):
 
 # Contact
 
-class ContactList(ListAPIView):
+class ContactList(CachedResponseMixin, ListAPIView):
     '''
     You can use `head_office` quary parameter to get only head office
     contacts (with `centre` foreign key that equals `NULL`)
     '''
     serializer_class = ContactSerializer
+    cache_models = (
+        Contact, Centre, City, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -303,14 +355,16 @@ class ContactList(ListAPIView):
         return queryset
 
 
-class ContactDetail(RetrieveAPIView):
+class ContactDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = ContactSerializer
+    cache_models = (
+        Contact, Centre, City, )
     queryset = Contact.objects.all()
 
 
 # Centre
 
-class CentreList(ListAPIView):
+class CentreList(CachedResponseMixin, ListAPIView):
     '''
     You can use `related` quary parameter to specify singular relation that
     should be included in serialized objects list. Available options are:
@@ -318,6 +372,8 @@ class CentreList(ListAPIView):
     1. 'related=city', to include only nested city object
     '''
     serializer_class = CentreListSerializer
+    cache_models = (
+        Centre, City, Project, ProjectArea, Event, EventCategory, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -331,13 +387,28 @@ class CentreList(ListAPIView):
         return queryset
 
 
-class CentreDetail(RetrieveAPIView):
+class CentreDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = CentreDetailSerializer
+    cache_models = (
+        Centre, City, Contact, Participant, Project, ProjectArea,
+        Event, EventCategory, CentreSubpage, )
 
     @set_eager_loading
     def get_queryset(self):
         return Centre.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        '''
+        Served from materialized document. Missing or stale document is
+        built on the spot
+        '''
+        document = CentreDocument.objects.get_document(self.kwargs['pk'])
+
+        if document is None:
+            document = CentreDocumentBuilder().build(self.get_object())
+
+        return Response(document)
+
 
 # CentreSubpage
 
@@ -347,8 +418,10 @@ class CentreSubpageFilter(django_filters.FilterSet):
         fields = ['centre__city']
 
 
-class CentreSubpageList(ListAPIView):
+class CentreSubpageList(CachedResponseMixin, ListAPIView):
     serializer_class = CentreSubpageSerializer
+    cache_models = (
+        CentreSubpage, Centre, City, )
 
     filter_backends = (django_filters.DjangoFilterBackend,)
     filter_class = CentreSubpageFilter
@@ -358,8 +431,10 @@ class CentreSubpageList(ListAPIView):
         return CentreSubpage.objects.all()
 
 
-class CentreSubpageDetail(RetrieveAPIView):
+class CentreSubpageDetail(CachedResponseMixin, RetrieveAPIView):
     serializer_class = CentreSubpageSerializer
+    cache_models = (
+        CentreSubpage, Centre, City, )
 
     @set_eager_loading
     def get_queryset(self):
@@ -374,7 +449,7 @@ class WorksheetList(CreateModelMixin, GenericAPIView):
 
     def perform_create(self, serializer):
         '''
-        Send an e-mail notification on succesfull serializer save
+        Queue an e-mail notification on succesfull serializer save
         '''
         worksheet = serializer.save()
         serializer.send_worksheet_email(worksheet)
@@ -385,7 +460,7 @@ class WorksheetList(CreateModelMixin, GenericAPIView):
 
 # Scraping
 
-class ScrapingList(CreateModelMixin, GenericAPIView):
+class ScrapingList(GenericAPIView):
     serializer_class = ScrapingSerializer
     queryset = Scraping.objects.all()
 
@@ -396,5 +471,12 @@ class ScrapingList(CreateModelMixin, GenericAPIView):
         API request. Any malicious data is escaped, used *only* for scraping
         bots and will not last long becuse next regular page view by client
         will completely overwrite it in the database. No profit for an attacker
+
+        Write is coalesced, so `202 Accepted` is answered with ingestion
+        status (see `ScrapingIngestion`) instead of a stored resource
         '''
-        return self.create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            {'status': serializer.submit()}, status=status.HTTP_202_ACCEPTED)